@@ -0,0 +1,64 @@
+"""Chat indexes and cascade
+
+Revision ID: 3bba5ce6c343
+Revises: 6dafb6d9efad
+Create Date: 2026-10-18 09:10:42.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3bba5ce6c343'
+down_revision: Union[str, None] = '6dafb6d9efad'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The init revision created unnamed foreign keys. MSSQL names them itself (FK__messages__...),
+# SQLite leaves them unnamed; this convention lets batch mode address the SQLite one by name.
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+MESSAGES_CONVERSATION_FK = "fk_messages_conversation_id_conversations"
+
+
+def _foreign_key_name(table: str, column: str) -> str:
+    for fk in sa.inspect(op.get_bind()).get_foreign_keys(table):
+        if fk["constrained_columns"] == [column] and fk["name"]:
+            return fk["name"]
+    return NAMING_CONVENTION["fk"] % {
+        "table_name": table, "column_0_name": column, "referred_table_name": "conversations"
+    }
+
+
+def upgrade() -> None:
+    # Only messages.conversation_id cascades: MSSQL rejects a second cascade path from users
+    # (users -> conversations -> messages and users -> messages).
+    existing_fk = _foreign_key_name('messages', 'conversation_id')
+    with op.batch_alter_table('messages', naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(existing_fk, type_='foreignkey')
+        batch_op.create_foreign_key(
+            MESSAGES_CONVERSATION_FK, 'conversations', ['conversation_id'], ['id'], ondelete='CASCADE'
+        )
+
+    op.create_index('ix_messages_user_conversation_created', 'messages',
+                    ['user_id', 'conversation_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_messages_user_created', 'messages',
+                    ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_messages_conversation_id', 'messages', ['conversation_id'], unique=False)
+    op.create_index('ix_conversations_user_created', 'conversations',
+                    ['user_id', 'created_at', 'id'], unique=False, mssql_include=['title'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_conversations_user_created', table_name='conversations')
+    op.drop_index('ix_messages_conversation_id', table_name='messages')
+    op.drop_index('ix_messages_user_created', table_name='messages')
+    op.drop_index('ix_messages_user_conversation_created', table_name='messages')
+
+    with op.batch_alter_table('messages', naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(MESSAGES_CONVERSATION_FK, type_='foreignkey')
+        batch_op.create_foreign_key(
+            MESSAGES_CONVERSATION_FK, 'conversations', ['conversation_id'], ['id']
+        )
@@ -3,17 +3,22 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
-from app.core.security import SECRET_KEY, ALGORITHM, decrypt_data
-from app.repository.db import get_db
+from app.core.security import SECRET_KEY, ALGORITHM, decrypt_data_cached, security_stamp
+from app.core.tracing import traced
+from app.repository.db import SessionLocal, bind_user, get_db
 from app.repository.user_repository import UserRepository
 from data.models import User
 
 security_scheme = HTTPBearer()
 
+@traced("auth.get_current_user")
 def get_current_user(
     auth: HTTPAuthorizationCredentials = Depends(security_scheme),
     db: Session = Depends(get_db)
 ) -> User:
+    """The user is usually a detached row from the process-wide user cache, shared with
+    concurrent requests: read it, never mutate it. To change the user, load it again through
+    the session (UserRepository.update_user does) so the write also invalidates the cache."""
     token = auth.credentials
     
     credentials_exception = HTTPException(
@@ -31,12 +36,29 @@ def get_current_user(
         raise credentials_exception
     
     repo = UserRepository(db)
-    user = repo.get_by_username(username)
+    user_id = payload.get("uid")
+    if user_id is not None:
+        bind_user(db, user_id)
+        user = repo.get_cached_by_id(user_id)
+    else:
+        user = repo.get_by_username(username)
     
     if user is None:
         raise credentials_exception
+    bind_user(db, user.id)
+
+    stamp = payload.get("sv")
+    if stamp is not None and stamp != security_stamp(user.password_hash):
+        raise credentials_exception
     return user
 
+def get_current_user_id(auth: HTTPAuthorizationCredentials = Depends(security_scheme)) -> int:
+    """For endpoints that outlive the request, like SSE streams: the session is closed before
+    returning, instead of holding a pooled connection until the response ends."""
+    with SessionLocal() as db:
+        return get_current_user(auth, db).id
+
+@traced("auth.get_current_user_api_key")
 def get_current_user_api_key(
     current_user: User = Depends(get_current_user),
 ) -> str:
@@ -46,7 +68,7 @@ def get_current_user_api_key(
             detail="Gemini API Key not found for this user. Please update your profile."
         )
 
-    plain_api_key = decrypt_data(current_user.encrypted_api_key, SECRET_KEY)
+    plain_api_key = decrypt_data_cached(current_user.encrypted_api_key, SECRET_KEY)
     
     if not plain_api_key:
         raise HTTPException(
@@ -1,29 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
-from app.api.deps import get_current_user, get_current_user_api_key
+from app.api.deps import get_current_user, get_current_user_api_key, get_current_user_id
 from app.core.security import decrypt_data
 from app.core.chat_agent import ChatAgent
+from app.core.title_queue import DEFAULT_TITLES, TitleJob, get_title_queue
+from app.core.context_window import HISTORY_SUMMARY_WORDS, compaction_split, format_history, needs_compaction
 from app.repository.db import get_db
-from app.repository.chat_repository import ChatRepository
+from app.repository.chat_repository import ChatRepository, ChatTurn
+from app.repository.pagination import Cursor, Page, decode_cursor, encode_cursor
 from app.api.dtos.chat_history import MessageDTO
 from app.api.dtos.conversation_history import ConversationHistory
 from data.models import User
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+EVENTS_KEEPALIVE_SECONDS = 15
+IMPORT_MAX_MESSAGES = int(os.getenv("IMPORT_MAX_MESSAGES", "50000"))
+
 from typing import Optional
 
 class ChatRequest(BaseModel):
     query: str
     conversation_id: Optional[int] = None 
+    bypass_cache: bool = False  # skip the answer cache lookup; a fresh answer still replaces the cached one
 
 class ChatResponse(BaseModel):
     response: str
     conversation_id: Optional[int] = None
     sources: list[str] = []
     title: Optional[str] = None
+    title_pending: bool = False  # a title is being generated; watch /chat/events or re-read /chat/conversations
+
+class ImportedMessage(BaseModel):
+    query: str
+    response: str
+    created_at: Optional[datetime] = None
+
+class ImportedConversation(BaseModel):
+    title: Optional[str] = None
+    messages: list[ImportedMessage] = []
+
+class ImportRequest(BaseModel):
+    conversations: list[ImportedConversation]
+
+class ImportResponse(BaseModel):
+    conversations: int
+    messages: int
 
 class NewConversationRequest(BaseModel):
     title: str = "New Chat"
@@ -42,23 +73,85 @@ def create_conversation(
     conv_id = repo.create_conversation(current_user.id, request.title)
     return NewConversationResponse(conversation_id=conv_id, title=request.title)
 
+@router.post("/import", response_model=ImportResponse)
+def import_conversations(
+    request: ImportRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    total = sum(len(conversation.messages) for conversation in request.conversations)
+    if total > IMPORT_MAX_MESSAGES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many messages in one import ({total} > {IMPORT_MAX_MESSAGES}); split the file"
+        )
+    repo = ChatRepository(db)
+    conversations, messages = repo.import_conversations(
+        current_user.id, (conversation.model_dump() for conversation in request.conversations)
+    )
+    return ImportResponse(conversations=conversations, messages=messages)
+
+def _page_cursors(
+    before: Optional[str] = Query(None, description="Return items older than this cursor"),
+    after: Optional[str] = Query(None, description="Return items newer than this cursor"),
+) -> tuple[Optional[Cursor], Optional[Cursor]]:
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either 'before' or 'after', not both")
+    try:
+        return (
+            decode_cursor(before) if before else None,
+            decode_cursor(after) if after else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _set_page_headers(response: Response, page: Page, oldest_first: bool) -> None:
+    response.headers["X-Has-More"] = "true" if page.has_more else "false"
+    if not page.items:
+        return
+    oldest, newest = page.items[0], page.items[-1]
+    if not oldest_first:
+        oldest, newest = newest, oldest
+    response.headers["X-Before-Cursor"] = encode_cursor(oldest.created_at, oldest.id)
+    response.headers["X-After-Cursor"] = encode_cursor(newest.created_at, newest.id)
+
 @router.get("/history", response_model=list[MessageDTO])
 def get_history(
+    response: Response,
     conversation_id: int = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursors: tuple = Depends(_page_cursors),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     
     repo = ChatRepository(db)
-    return repo.get_user_history(current_user.id, conversation_id=conversation_id)
+    before, after = cursors
+    if limit is None and before is None and after is None:
+        return repo.get_user_history(current_user.id, conversation_id=conversation_id)
+
+    page = repo.get_history_page(
+        current_user.id, conversation_id=conversation_id, limit=limit or 50, before=before, after=after
+    )
+    _set_page_headers(response, page, oldest_first=True)
+    return page.items
 
 @router.get("/conversations", response_model=list[ConversationHistory])
 def get_conversations(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursors: tuple = Depends(_page_cursors),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     repo = ChatRepository(db)
-    return repo.get_user_conversations(current_user.id)
+    before, after = cursors
+    if limit is None and before is None and after is None:
+        return repo.get_user_conversations(current_user.id)
+
+    page = repo.get_conversations_page(current_user.id, limit=limit or 50, before=before, after=after)
+    _set_page_headers(response, page, oldest_first=False)
+    return page.items
 
 @router.delete("/{conversation_id}")
 def delete_conversation(
@@ -72,50 +165,148 @@ def delete_conversation(
         raise HTTPException(status_code=404, detail="Conversation not found or access denied")
     return {"message": "Conversation deleted successfully"}
 
+async def _start_turn(
+    agent: ChatAgent, repo: ChatRepository, user_id: int, conversation_id: Optional[int]
+) -> tuple[list[dict], ChatTurn]:
+    """Reads the prompt history and returns it with the unit of work that will store the turn."""
+    if not conversation_id:
+        return [], await run_in_threadpool(repo.start_turn, user_id, conversation_id)
+
+    def read_history():
+        conversation = repo.get_conversation(conversation_id)
+        if conversation is None or conversation.user_id != user_id:
+            return [], repo.start_turn(user_id, conversation_id)
+        messages = repo.get_messages_after(user_id, conversation_id, conversation.summary_message_id)
+        return messages, repo.start_turn(user_id, conversation_id, conversation)
+
+    messages, turn = await run_in_threadpool(read_history)
+    summary = turn.summary
+    if needs_compaction(summary, messages):
+        older, messages = compaction_split(summary, messages)
+        if older:
+            try:
+                summary = await agent.summarize(
+                    summary, [(msg.query, msg.response) for msg in older], HISTORY_SUMMARY_WORDS
+                )
+                # Stored with the turn's message, so the summary never points past what was saved.
+                turn.set_summary(summary, older[-1].id)
+            except Exception as e:
+                # The overflow is simply left out of this prompt and retried on the next turn.
+                print(f"Failed to summarize conversation {conversation_id}: {e}")
+    return format_history(summary, messages), turn
+
+def _create_agent(api_key: str) -> ChatAgent:
+    try:
+        return ChatAgent(api_key=api_key)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to initialize Chat Agent: {str(e)}")
+
+def _queue_title(turn: ChatTurn, api_key: str, query: str, response_text: str) -> bool:
+    if not turn.conversation_id or turn.title not in DEFAULT_TITLES:
+        return False
+    return get_title_queue().enqueue(TitleJob(turn.user_id, turn.conversation_id, api_key, query, response_text))
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @router.post("/", response_model=ChatResponse)
-def chat(
+async def chat(
     request: ChatRequest,
     api_key: str = Depends(get_current_user_api_key),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     repo = ChatRepository(db)
+    agent = _create_agent(api_key)
+    formatted_history, turn = await _start_turn(agent, repo, current_user.id, request.conversation_id)
 
-    formatted_history = []
-    if request.conversation_id:
-        db_history = repo.get_user_history(current_user.id, conversation_id=request.conversation_id)
-        for msg in db_history:
-            formatted_history.append({"role": "user", "parts": [{"text": msg.query}]})
-            formatted_history.append({"role": "model", "parts": [{"text": msg.response}]})
-
-    try:
-        agent = ChatAgent(api_key=api_key)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to initialize Chat Agent: {str(e)}")
+    response_text, sources = await agent.generate_response(
+        request.query, history=formatted_history, use_cache=not request.bypass_cache
+    )
 
-    response_text, sources = agent.generate_response(request.query, history=formatted_history)
+    await run_in_threadpool(turn.commit, request.query, response_text)
+    title_pending = _queue_title(turn, api_key, request.query, response_text)
 
-    repo.create_message(
-        user_id=current_user.id,
-        query=request.query,
+    return ChatResponse(
         response=response_text,
-        conversation_id=request.conversation_id
+        conversation_id=request.conversation_id,
+        sources=sources,
+        title_pending=title_pending
     )
 
-    new_title = None
-    if request.conversation_id:
-        conversation = repo.get_conversation(request.conversation_id)
-        if conversation and conversation.title in ["New Chat", "Nowy czat"]:
+@router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    api_key: str = Depends(get_current_user_api_key),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    repo = ChatRepository(db)
+    agent = _create_agent(api_key)
+    formatted_history, turn = await _start_turn(agent, repo, current_user.id, request.conversation_id)
+
+    async def event_stream():
+        cached = await agent.cached_answer(request.query, formatted_history, use_cache=not request.bypass_cache)
+        if cached is not None:
+            yield _sse_event("sources", {"sources": cached.sources})
+            yield _sse_event("token", {"text": cached.response})
+            response_text = cached.response
+        else:
+            start = time.perf_counter()
+            search_results = await agent.search_web(request.query)
+            # Sources go out before scraping, so the client has something to show right away.
+            yield _sse_event("sources", {"sources": [result.get("href") for result in search_results]})
+            full_context, sources = await agent.build_context(request.query, search_results)
+
+            chunks = []
             try:
-                generated_title = agent.generate_title(request.query, response_text)
-                repo.update_conversation_title(request.conversation_id, generated_title)
-                new_title = generated_title
+                async for text in agent.stream_response(request.query, full_context, history=formatted_history):
+                    chunks.append(text)
+                    yield _sse_event("token", {"text": text})
             except Exception as e:
-                print(f"Failed to generate title: {e}")
+                yield _sse_event("error", {"detail": f"Error generating response: {e}"})
+                return
 
-    return ChatResponse(
-        response=response_text,
-        conversation_id=request.conversation_id,
-        sources=sources,
-        title=new_title
+            response_text = "".join(chunks)
+            await agent.remember_answer(
+                request.query, formatted_history, response_text, sources, time.perf_counter() - start
+            )
+
+        message_id = await run_in_threadpool(turn.commit, request.query, response_text)
+        title_pending = _queue_title(turn, api_key, request.query, response_text)
+
+        yield _sse_event("done", {
+            "message_id": message_id,
+            "conversation_id": request.conversation_id,
+            "title": None,
+            "title_pending": title_pending,
+        })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/events")
+async def chat_events(user_id: int = Depends(get_current_user_id)):
+    events = get_title_queue().events
+
+    async def event_stream():
+        queue = events.subscribe(user_id)
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse_event("title", event)
+        finally:
+            events.unsubscribe(user_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
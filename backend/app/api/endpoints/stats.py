@@ -0,0 +1,66 @@
+from fastapi import APIRouter
+
+from app.core.answer_cache import get_answer_cache
+from app.core.gemini_clients import get_gemini_client_pool
+from app.core.metrics import stats_samples
+from app.core.page_cache import get_page_cache
+from app.core.scrape_client import get_scrape_client
+from app.core.search import get_search_cache
+from app.core.semantic_cache import get_semantic_cache_stats
+from app.core.title_queue import get_title_queue
+from app.core.security import decrypt_cache_stats
+from app.repository.db import get_pool_stats
+from app.repository.user_repository import user_cache_stats
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+@router.get("/cache")
+def get_cache_stats():
+    page_cache = get_page_cache()
+    answer_cache = get_answer_cache()
+    return {
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "semantic_cache": get_semantic_cache_stats(),
+        "page_cache": page_cache.stats() if page_cache else None,
+        "search_cache": get_search_cache().stats(),
+        "gemini_clients": get_gemini_client_pool().stats(),
+        "decrypted_secrets": decrypt_cache_stats(),
+        "users": user_cache_stats(),
+    }
+
+@router.get("/scrape")
+def get_scrape_stats():
+    return get_scrape_client().stats()
+
+@router.get("/titles")
+def get_title_stats():
+    return get_title_queue().stats()
+
+@router.get("/db")
+def get_db_stats():
+    return get_pool_stats()
+
+CACHE_COUNTERS = {
+    "hits", "misses", "stale", "revalidations", "evictions", "expirations", "bypassed", "coalesced",
+    "created", "reused", "latency_saved_seconds",
+}
+DB_COUNTERS = {
+    "checkouts", "waits", "wait_seconds_total", "timeouts", "connections_opened", "connections_closed", "invalidated",
+}
+TITLE_COUNTERS = {"enqueued", "completed", "retried", "failed", "dropped"}
+SCRAPE_COUNTERS = {"requests", "waited_global", "waited_host"}
+
+def stats_metrics() -> list[str]:
+    """The /stats numbers in Prometheus form, read when /metrics is scraped."""
+    db_stats = get_db_stats()
+    replica = db_stats.pop("replica", None)
+    db_series = [({"database": "primary"}, db_stats)]
+    if replica is not None:
+        db_series.append(({"database": "replica"}, replica))
+    return (
+        stats_samples("chatbot_cache", [({"cache": name}, stats) for name, stats in get_cache_stats().items()],
+                      CACHE_COUNTERS)
+        + stats_samples("chatbot_db_pool", db_series, DB_COUNTERS)
+        + stats_samples("chatbot_title_queue", [({}, get_title_stats())], TITLE_COUNTERS)
+        + stats_samples("chatbot_scrape", [({}, get_scrape_stats())], SCRAPE_COUNTERS)
+    )
@@ -19,7 +19,9 @@ from app.core.security import (
     create_refresh_token,
     encrypt_data,
     decrypt_data,
+    decrypt_data_cached,
     generate_recovery_tokens,
+    user_token_claims,
     SECRET_KEY,
     ALGORITHM,
 )
@@ -57,11 +59,12 @@ def register(
     )
 
     access_token_expires = timedelta(minutes=5)
+    claims = user_token_claims(user)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={**claims, "type": "access"}, expires_delta=access_token_expires
     )
     
-    refresh_token = create_refresh_token(data={"sub": user.username})
+    refresh_token = create_refresh_token(data={**claims, "type": "refresh"})
 
     return {
         "access_token": access_token,
@@ -88,11 +91,9 @@ def login(
             detail="Invalid credentials",
         )
 
-    access_payload = {
-        "sub": user.username, 
-        "type": "access"
-    }
-    refresh_payload = {"sub": user.username, "type": "refresh"}
+    claims = user_token_claims(user)
+    access_payload = {**claims, "type": "access"}
+    refresh_payload = {**claims, "type": "refresh"}
 
     return Token(
         access_token=create_access_token(access_payload),
@@ -115,12 +116,12 @@ def refresh(data: RefreshToken):
                 detail="Invalid token type",
             )
 
-        user_id = payload.get("sub")   
-        new_access_payload = {"sub": user_id, "type": "access"}
+        claims = {key: payload[key] for key in ("sub", "uid", "sv") if key in payload}
+        new_access_payload = {**claims, "type": "access"}
         
         return Token(
             access_token=create_access_token(new_access_payload),
-            refresh_token=create_refresh_token({"sub": user_id, "type": "refresh"}),
+            refresh_token=create_refresh_token({**claims, "type": "refresh"}),
         )
 
     except ExpiredSignatureError:
@@ -158,7 +159,7 @@ def get_profile(
     api_key = None
     if current_user.encrypted_api_key:
         try:
-            api_key = decrypt_data(current_user.encrypted_api_key, SECRET_KEY)
+            api_key = decrypt_data_cached(current_user.encrypted_api_key, SECRET_KEY)
         except Exception:
             pass
 
@@ -223,8 +224,7 @@ def verify_recovery_token(
     
     new_encrypted_tokens = encrypt_data(json.dumps(tokens), SECRET_KEY)
     
-    user.recovery_tokens = new_encrypted_tokens
-    db.commit()
+    repo.update_recovery_tokens(user, new_encrypted_tokens)
 
     return {"reset_token": reset_token}
 
@@ -0,0 +1,75 @@
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.core.search import tokenize
+from app.core.ttl_cache import TTLCache
+
+load_dotenv()
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "86400"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2048"))
+
+
+def normalize_question(query: str) -> str:
+    # Unlike search queries, stopwords stay: "is" and "is not" need different answers.
+    return " ".join(tokenize(query))
+
+
+@dataclass
+class CachedAnswer:
+    response: str
+    sources: list[str] = field(default_factory=list)
+    latency: float = 0.0
+
+
+class AnswerCache:
+    """Complete answers to first-turn questions, keyed by model, prompt version and normalized text."""
+
+    def __init__(self, maxsize: int = ANSWER_CACHE_MAX_ENTRIES, ttl: float = ANSWER_CACHE_TTL):
+        self._answers = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.bypassed = 0
+        self.latency_saved = 0.0
+
+    @staticmethod
+    def key(model: str, prompt_version: str, query: str) -> tuple[str, str, str]:
+        return model, prompt_version, normalize_question(query)
+
+    def get(self, model: str, prompt_version: str, query: str) -> Optional[CachedAnswer]:
+        answer = self._answers.get(self.key(model, prompt_version, query))
+        if answer is not None:
+            with self._lock:
+                self.latency_saved += answer.latency
+        return answer
+
+    def set(self, model: str, prompt_version: str, query: str, answer: CachedAnswer) -> None:
+        self._answers.set(self.key(model, prompt_version, query), answer)
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self.bypassed += 1
+
+    def clear(self) -> None:
+        self._answers.clear()
+
+    def stats(self) -> dict:
+        return {
+            **self._answers.stats(),
+            "bypassed": self.bypassed,
+            "latency_saved_seconds": round(self.latency_saved, 3),
+        }
+
+
+_answer_cache: Optional[AnswerCache] = None
+
+
+def get_answer_cache() -> Optional[AnswerCache]:
+    global _answer_cache
+    if _answer_cache is None and ANSWER_CACHE_ENABLED:
+        _answer_cache = AnswerCache()
+    return _answer_cache
@@ -1,67 +1,178 @@
-import requests
-from bs4 import BeautifulSoup
-from duckduckgo_search import DDGS
-from google import genai
+import asyncio
+import codecs
+import os
+import time
+from typing import AsyncIterator, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from app.core.answer_cache import CachedAnswer, get_answer_cache
+from app.core.context_ranking import select_context
+from app.core.gemini_clients import get_gemini_client_pool
+from app.core.html_extract import PlainTextParser, get_html_extractor
+from app.core.metrics import CACHE_RESULTS, ERRORS, STAGE_SECONDS, timed
+from app.core.page_cache import CachedPage, get_page_cache
+from app.core.scrape_client import get_scrape_client
+from app.core.search import SearchProvider, get_search_cache, get_search_provider
+from app.core.semantic_cache import get_semantic_cache
+from app.core.tracing import SPAN_KIND_CLIENT, current_span, end_span, span, start_span, traced
+
+load_dotenv()
 
 MODEL = "gemini-2.5-flash"
+# Bump whenever build_prompt changes so cached answers from the old prompt are not reused.
+PROMPT_VERSION = "1"
+SCRAPE_DEADLINE = 12
+SCRAPE_MAX_BYTES = int(os.getenv("SCRAPE_MAX_BYTES", str(2 * 1024 * 1024)))
+SCRAPE_CHUNK_BYTES = 64 * 1024
+
+HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml"}
+TEXT_CONTENT_TYPES = {"text/plain"}
+
 
 class ChatAgent:
-    def __init__(self, api_key: str):
-        self.client = genai.Client(api_key=api_key)
+    def __init__(self, api_key: str, search_provider: SearchProvider = None):
+        self.client = get_gemini_client_pool().get(api_key)
+        self.search_provider = search_provider or get_search_provider()
 
-    def search_web(self, query: str, max_results: int = 3):
+    async def search_web(self, query: str, max_results: int = 3):
         try:
             print(f"Searching web for: {query}")
-            with DDGS() as ddgs:
-                results = list(ddgs.text(query, max_results=max_results))
-                print(f"Found {len(results)} results")
-                return results
+            with STAGE_SECONDS.time("search"), span("search", SPAN_KIND_CLIENT, **{"search.query": query}) as s:
+                results = await get_search_cache().get_or_fetch(
+                    query, max_results, lambda: self.search_provider.search(query, max_results)
+                )
+                s.set_attribute("search.results", len(results))
+            print(f"Found {len(results)} results")
+            return results
         except Exception as e:
+            ERRORS.inc("search")
             print(f"Error searching web: {e}")
             return []
 
-    def scrape_url(self, url: str) -> str:
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
+    @staticmethod
+    def extract_text(html: str) -> str:
+        return get_html_extractor().extract(html)
 
-            for script in soup(["script", "style"]):
-                script.decompose()
+    @staticmethod
+    async def read_text(response: httpx.Response, max_bytes: int = SCRAPE_MAX_BYTES) -> str:
+        """Streams at most `max_bytes` of an HTML or plain-text body through the extractor."""
+        content_type = response.headers.get("Content-Type", "text/html").split(";")[0].strip().lower()
+        if content_type in HTML_CONTENT_TYPES:
+            parser = get_html_extractor().parser()
+        elif content_type in TEXT_CONTENT_TYPES:
+            parser = PlainTextParser()
+        else:
+            print(f"Skipping {response.url}: unsupported content type {content_type}")
+            return ""
 
-            text = soup.get_text()
+        def feed(text: str) -> float:
+            start = time.perf_counter()
+            parser.feed(text)
+            return time.perf_counter() - start
 
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = "\n".join(chunk for chunk in chunks if chunk)
+        decoder = codecs.getincrementaldecoder(response.charset_encoding or "utf-8")(errors="replace")
+        received = 0
+        parse_seconds = 0.0
+        async for chunk in response.aiter_bytes(SCRAPE_CHUNK_BYTES):
+            if not received and b"\x00" in chunk[:1024]:
+                print(f"Skipping {response.url}: binary content served as {content_type}")
+                return ""
+            chunk = chunk[:max_bytes - received]
+            received += len(chunk)
+            parse_seconds += await asyncio.to_thread(feed, decoder.decode(chunk))
+            if received >= max_bytes:
+                print(f"Truncated {response.url} at {max_bytes} bytes")
+                current_span().set_attribute("http.response.truncated", True)
+                break
+        parse_seconds += await asyncio.to_thread(feed, decoder.decode(b"", final=True))
+        start = time.perf_counter()
+        text = await asyncio.to_thread(parser.close)
+        # Parser time only, so waits for the network or the thread pool do not show up as parsing.
+        STAGE_SECONDS.observe(parse_seconds + time.perf_counter() - start, "html_extract")
+        page_span = current_span()
+        page_span.set_attribute("http.response.body.size", received)
+        page_span.set_attribute("scrape.text_chars", len(text))
+        page_span.set_attribute("scrape.parse_seconds", round(parse_seconds, 6))
+        return text
 
+    async def scrape_url(self, url: str) -> str:
+        with span("scrape", SPAN_KIND_CLIENT, **{"url.full": url}):
+            return await self._scrape_url(url)
+
+    async def _scrape_url(self, url: str) -> str:
+        start = time.perf_counter()
+        try:
+            page_cache = get_page_cache()
+            cached = await page_cache.get_async(url) if page_cache else None
+            if cached and cached.is_fresh(page_cache.ttl):
+                current_span().set_attribute("scrape.cache", "hit")
+                return cached.text
+
+            headers = {}
+            if cached and cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached and cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+            async with get_scrape_client().stream(url, headers=headers) as response:
+                current_span().set_attribute("http.response.status_code", response.status_code)
+                if response.status_code == 304 and cached:
+                    await page_cache.revalidated_async(cached)
+                    current_span().set_attribute("scrape.cache", "revalidated")
+                    return cached.text
+                response.raise_for_status()
+                text = await self.read_text(response)
+
+            if page_cache and text:
+                await page_cache.set_async(CachedPage(
+                    url=url,
+                    text=text,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                ))
             return text
         except Exception as e:
+            ERRORS.inc("scrape")
+            current_span().record_exception(e)
             print(f"Failed to scrape {url}: {e}")
             return ""
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, "scrape")
 
-    def generate_response(
-        self, user_query: str, history: list[dict] = []
-    ) -> tuple[str, list[str]]:
-        chat_session = self.client.chats.create(model=MODEL, history=history)
-        search_results = self.search_web(user_query)
-        context_data = []
-        sources = []
-
-        for result in search_results:
-            url = result.get("href")
-            title = result.get("title")
-            sources.append(url)
-
-            content = self.scrape_url(url)
-            if content:
-                context_data.append(
-                    f"SOURCE: {title} ({url})\nCONTENT:\n{content[:20000]}\n"
-                )
+    async def fetch_context(
+        self, search_results: list[dict], deadline: float = SCRAPE_DEADLINE
+    ) -> tuple[list[tuple[dict, str]], list[str]]:
+        sources = [result.get("href") for result in search_results]
+        if not search_results:
+            return [], sources
 
-        full_context = "\n".join(context_data)
+        tasks = [asyncio.create_task(self.scrape_url(url)) for url in sources]
+        done, not_done = await asyncio.wait(tasks, timeout=deadline)
+        for task in not_done:
+            task.cancel()
+        if not_done:
+            print(f"Scrape deadline of {deadline}s hit, skipping {len(not_done)} source(s)")
 
-        prompt = f"""
+        pages = []
+        for result, task in zip(search_results, tasks):
+            if task in done and task.result():
+                pages.append((result, task.result()))
+        return pages, sources
+
+    async def gather_context(self, user_query: str) -> tuple[str, list[str]]:
+        search_results = await self.search_web(user_query)
+        return await self.build_context(user_query, search_results)
+
+    async def build_context(self, user_query: str, search_results: list[dict]) -> tuple[str, list[str]]:
+        pages, sources = await self.fetch_context(search_results)
+        with STAGE_SECONDS.time("context_select"):
+            context_data = await asyncio.to_thread(select_context, user_query, pages)
+        return "\n".join(context_data), sources
+
+    def build_prompt(self, user_query: str, full_context: str) -> str:
+        return f"""
         Instructions:
         You are an expert Python programming assistant. Your goal is to help users write, debug, and understand Python code and general programming concepts applied in Python.
 
@@ -94,13 +205,101 @@ class ChatAgent:
         </user_query>
         """
 
+    async def cached_answer(
+        self, user_query: str, history: list[dict], use_cache: bool = True
+    ) -> Optional[CachedAnswer]:
+        answer_cache = get_answer_cache()
+        semantic_cache = get_semantic_cache(f"{MODEL}/{PROMPT_VERSION}")
+        if history or (answer_cache is None and semantic_cache is None):
+            return None
+        if not use_cache:
+            if answer_cache is not None:
+                answer_cache.record_bypass()
+            CACHE_RESULTS.inc("bypass")
+            return None
+        cached = answer_cache.get(MODEL, PROMPT_VERSION, user_query) if answer_cache else None
+        if cached is not None:
+            CACHE_RESULTS.inc("exact_hit")
+        elif semantic_cache is not None:
+            match = await asyncio.to_thread(semantic_cache.lookup, user_query)
+            if match is not None:
+                cached, score = match
+                CACHE_RESULTS.inc("semantic_hit")
+                print(f"Semantic cache hit ({score:.2f}) for: {user_query}")
+        if cached is None:
+            CACHE_RESULTS.inc("miss")
+        return cached
+
+    async def remember_answer(
+        self, user_query: str, history: list[dict], response_text: str, sources: list[str], latency: float
+    ) -> None:
+        if history or not response_text:
+            return
+        answer = CachedAnswer(response_text, sources, latency)
+        # Caching is best effort; a failure here must not cost the user a good answer.
         try:
-            response = chat_session.send_message(prompt)
-            return response.text, sources
+            answer_cache = get_answer_cache()
+            if answer_cache is not None:
+                answer_cache.set(MODEL, PROMPT_VERSION, user_query, answer)
+            semantic_cache = get_semantic_cache(f"{MODEL}/{PROMPT_VERSION}")
+            if semantic_cache is not None:
+                await asyncio.to_thread(semantic_cache.add, user_query, answer)
         except Exception as e:
+            print(f"Failed to cache answer: {e}")
+
+    async def generate_response(
+        self, user_query: str, history: list[dict] = [], use_cache: bool = True
+    ) -> tuple[str, list[str]]:
+        cached = await self.cached_answer(user_query, history, use_cache)
+        if cached is not None:
+            return cached.response, cached.sources
+
+        start = time.perf_counter()
+        chat_session = self.client.aio.chats.create(model=MODEL, history=history)
+        full_context, sources = await self.gather_context(user_query)
+        prompt = self.build_prompt(user_query, full_context)
+
+        try:
+            with STAGE_SECONDS.time("gemini_generate"), span("gemini.generate", SPAN_KIND_CLIENT, **{
+                "gen_ai.request.model": MODEL, "gen_ai.prompt.chars": len(prompt), "gen_ai.history.turns": len(history),
+            }) as s:
+                response = await chat_session.send_message(prompt)
+                s.set_attribute("gen_ai.response.chars", len(response.text or ""))
+        except Exception as e:
+            ERRORS.inc("gemini_generate")
             return f"Error generating response: {e}", []
+        await self.remember_answer(user_query, history, response.text, sources, time.perf_counter() - start)
+        return response.text, sources
+
+    async def stream_response(
+        self, user_query: str, full_context: str, history: list[dict] = []
+    ) -> AsyncIterator[str]:
+        chat_session = self.client.aio.chats.create(model=MODEL, history=history)
+        prompt = self.build_prompt(user_query, full_context)
+
+        start = time.perf_counter()
+        stream_span = start_span("gemini.stream", SPAN_KIND_CLIENT, {
+            "gen_ai.request.model": MODEL, "gen_ai.prompt.chars": len(prompt), "gen_ai.history.turns": len(history),
+        })
+        chars = 0
+        error = None
+        try:
+            async for chunk in await chat_session.send_message_stream(prompt):
+                if chunk.text:
+                    chars += len(chunk.text)
+                    yield chunk.text
+        except Exception as e:
+            ERRORS.inc("gemini_stream")
+            error = e
+            raise
+        finally:
+            stream_span.set_attribute("gen_ai.response.chars", chars)
+            end_span(stream_span, error)
+            STAGE_SECONDS.observe(time.perf_counter() - start, "gemini_stream")
 
-    def generate_title(self, user_query: str, response_text: str) -> str:
+    @timed("gemini_title")
+    @traced("gemini.title", SPAN_KIND_CLIENT)
+    async def generate_title(self, user_query: str, response_text: str) -> str:
         prompt = f"""
         Based on the following user query and model response, generate a short, concise title (max 5-6 words) for this conversation.
         The title should summarize the topic. Do not use quotes.
@@ -108,12 +307,30 @@ class ChatAgent:
         User Query: {user_query}
         Response: {response_text[:200]}... 
         """
-        try:
-            response = self.client.models.generate_content(
-                model=MODEL,
-                contents=prompt
-            )
-            return response.text.replace('"', '').strip()
-        except Exception as e:
-            print(f"Error generating title: {e}")
-            return "New Chat"
+        response = await self.client.aio.models.generate_content(
+            model=MODEL,
+            contents=prompt
+        )
+        return response.text.replace('"', '').strip()[:200]
+
+    @timed("gemini_summarize")
+    @traced("gemini.summarize", SPAN_KIND_CLIENT)
+    async def summarize(self, previous_summary: Optional[str], turns: list[tuple[str, str]], max_words: int) -> str:
+        transcript = "\n\n".join(f"User: {query}\nAssistant: {response}" for query, response in turns)
+        prompt = f"""
+        You maintain a running summary of a conversation between a user and a Python programming assistant.
+        Update the summary with the new exchanges below. Keep the facts, code identifiers, decisions and open
+        questions that later answers may depend on; drop pleasantries and repeated explanations.
+        Reply with the updated summary only, in at most {max_words} words.
+
+        Current summary:
+        {previous_summary or "(none)"}
+
+        New exchanges:
+        {transcript}
+        """
+        response = await self.client.aio.models.generate_content(
+            model=MODEL,
+            contents=prompt
+        )
+        return response.text.strip()
@@ -0,0 +1,112 @@
+import os
+import re
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.core.search import STOPWORDS
+
+load_dotenv()
+
+CONTEXT_CHAR_BUDGET = int(os.getenv("CONTEXT_CHAR_BUDGET", "12000"))
+CONTEXT_CHUNK_CHARS = int(os.getenv("CONTEXT_CHUNK_CHARS", "800"))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TERM_RE = re.compile(r"[a-z0-9_]+")
+
+
+def stem(term: str) -> str:
+    # Plural folding only: "zeros" should match "zero" without pulling in a stemmer.
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+
+def tokenize(text: str) -> list[str]:
+    return [stem(term) for term in _TERM_RE.findall(text.lower()) if term not in STOPWORDS]
+
+
+def chunk_text(text: str, size: int = CONTEXT_CHUNK_CHARS) -> list[str]:
+    """Groups consecutive lines into chunks of about `size` characters, splitting only overlong lines."""
+    chunks = []
+    current = []
+    length = 0
+    for line in text.splitlines():
+        while len(line) > size:
+            if current:
+                chunks.append("\n".join(current))
+                current, length = [], 0
+            chunks.append(line[:size])
+            line = line[size:]
+        if length + len(line) > size and current:
+            chunks.append("\n".join(current))
+            current, length = [], 0
+        if line:
+            current.append(line)
+            length += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def bm25_scores(query: str, chunks: list[str]) -> np.ndarray:
+    query_terms = list(dict.fromkeys(tokenize(query)))
+    if not chunks or not query_terms:
+        return np.zeros(len(chunks))
+
+    column = {term: index for index, term in enumerate(query_terms)}
+    tf = np.zeros((len(chunks), len(query_terms)))
+    lengths = np.zeros(len(chunks))
+    for row, chunk in enumerate(chunks):
+        terms = tokenize(chunk)
+        lengths[row] = len(terms)
+        for term in terms:
+            index = column.get(term)
+            if index is not None:
+                tf[row, index] += 1
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((len(chunks) - df + 0.5) / (df + 0.5))
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(lengths.mean(), 1.0))
+    return ((tf * (BM25_K1 + 1)) / (tf + norm[:, None])) @ idf
+
+
+def select_context(
+    query: str,
+    pages: list[tuple[dict, str]],
+    budget: int = CONTEXT_CHAR_BUDGET,
+    chunk_chars: int = CONTEXT_CHUNK_CHARS,
+) -> list[str]:
+    """Packs the chunks of `pages` that best match `query` into `budget` characters, one block per source."""
+    chunks = []
+    owners = []
+    positions = []
+    for page_index, (_, text) in enumerate(pages):
+        for position, chunk in enumerate(chunk_text(text, chunk_chars)):
+            chunks.append(chunk)
+            owners.append(page_index)
+            positions.append(position)
+    if not chunks:
+        return []
+
+    scores = bm25_scores(query, chunks)
+    # Highest score first; ties (including "nothing matched") go to chunks nearer the top of a page.
+    order = np.lexsort((np.array(owners), np.array(positions), -scores))
+
+    selected = [[] for _ in pages]
+    used = 0
+    for index in order:
+        size = len(chunks[index]) + 1
+        if used + size > budget:
+            continue
+        selected[owners[index]].append(index)
+        used += size
+
+    context_data = []
+    for (result, _), indices in zip(pages, selected):
+        if indices:
+            content = "\n...\n".join(chunks[index] for index in sorted(indices))
+            context_data.append(f"SOURCE: {result.get('title')} ({result.get('href')})\nCONTENT:\n{content}\n")
+    return context_data
@@ -0,0 +1,58 @@
+import os
+from typing import Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "8000"))
+HISTORY_SUMMARY_WORDS = int(os.getenv("HISTORY_SUMMARY_WORDS", "300"))
+
+# Gemini averages roughly four characters per token for English prose and code;
+# a cheap estimate is enough since the budget only has to bound prompt growth.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def turn_tokens(message) -> int:
+    return estimate_tokens(message.query) + estimate_tokens(message.response)
+
+
+def split_recent(messages: list, budget: int) -> tuple[list, list]:
+    """Splits oldest-first messages into (older, recent) where recent is the longest suffix within budget."""
+    used = 0
+    start = len(messages)
+    while start > 0:
+        tokens = turn_tokens(messages[start - 1])
+        if used + tokens > budget:
+            break
+        used += tokens
+        start -= 1
+    return messages[:start], messages[start:]
+
+
+def needs_compaction(summary: Optional[str], messages: list, budget: int = HISTORY_TOKEN_BUDGET) -> bool:
+    return estimate_tokens(summary) + sum(turn_tokens(message) for message in messages) > budget
+
+
+def compaction_split(summary: Optional[str], messages: list, budget: int = HISTORY_TOKEN_BUDGET) -> tuple[list, list]:
+    # Keep only half of the remaining budget verbatim so the next few turns fit
+    # without another summarization call; the rest is folded into the summary.
+    remaining = max(budget - estimate_tokens(summary), 0)
+    return split_recent(messages, remaining // 2)
+
+
+def format_history(summary: Optional[str], messages: list) -> list[dict]:
+    formatted_history = []
+    if summary:
+        formatted_history.append({"role": "user", "parts": [{"text": f"Summary of our conversation so far:\n{summary}"}]})
+        formatted_history.append({"role": "model", "parts": [{"text": "Understood, I will keep that in mind."}]})
+    for msg in messages:
+        formatted_history.append({"role": "user", "parts": [{"text": msg.query}]})
+        formatted_history.append({"role": "model", "parts": [{"text": msg.response}]})
+    return formatted_history
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from dotenv import load_dotenv
+from google import genai
+from google.genai import types
+
+load_dotenv()
+
+GEMINI_CLIENT_POOL_SIZE = int(os.getenv("GEMINI_CLIENT_POOL_SIZE", "256"))
+GEMINI_CLIENT_IDLE_SECONDS = int(os.getenv("GEMINI_CLIENT_IDLE_SECONDS", "900"))
+# Overrides the Gemini API endpoint, e.g. to point load tests at benchmarks.fake_gemini.
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "")
+
+
+def _hash_api_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class _PooledClient:
+    def __init__(self, client: genai.Client):
+        self.client = client
+        self.last_used = time.monotonic()
+        self.uses = 0
+
+
+class GeminiClientPool:
+    """Keeps one genai.Client per API key so its HTTP connections stay warm across chat turns.
+
+    Entries are keyed by a hash of the API key, dropped after `idle_seconds` without use and
+    evicted least-recently-used beyond `maxsize`. Dropped clients are not closed explicitly;
+    a request may still hold one, and genai closes its transports when it is garbage collected.
+    """
+
+    def __init__(self, maxsize: int = GEMINI_CLIENT_POOL_SIZE, idle_seconds: float = GEMINI_CLIENT_IDLE_SECONDS):
+        self.maxsize = maxsize
+        self.idle_seconds = idle_seconds
+        self.created = 0
+        self.reused = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._clients: OrderedDict[str, _PooledClient] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _create_client(self, api_key: str) -> genai.Client:
+        if GEMINI_BASE_URL:
+            return genai.Client(api_key=api_key, http_options=types.HttpOptions(base_url=GEMINI_BASE_URL))
+        return genai.Client(api_key=api_key)
+
+    def get(self, api_key: str) -> genai.Client:
+        key = _hash_api_key(api_key)
+        now = time.monotonic()
+        with self._lock:
+            self._expire_idle(now)
+            pooled = self._clients.get(key)
+            if pooled is None:
+                pooled = _PooledClient(self._create_client(api_key))
+                self._clients[key] = pooled
+                self.created += 1
+                while len(self._clients) > self.maxsize:
+                    self._clients.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._clients.move_to_end(key)
+                self.reused += 1
+            pooled.last_used = now
+            pooled.uses += 1
+            return pooled.client
+
+    def discard(self, api_key: str) -> None:
+        with self._lock:
+            self._clients.pop(_hash_api_key(api_key), None)
+
+    def _expire_idle(self, now: float) -> None:
+        while self._clients:
+            key, oldest = next(iter(self._clients.items()))
+            if now - oldest.last_used < self.idle_seconds:
+                break
+            del self._clients[key]
+            self.expirations += 1
+
+    def stats(self) -> dict:
+        requests = self.created + self.reused
+        return {
+            "size": len(self._clients),
+            "maxsize": self.maxsize,
+            "created": self.created,
+            "reused": self.reused,
+            "reuse_ratio": round(self.reused / requests, 4) if requests else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+_client_pool: Optional[GeminiClientPool] = None
+
+
+def get_gemini_client_pool() -> GeminiClientPool:
+    global _client_pool
+    if _client_pool is None:
+        _client_pool = GeminiClientPool()
+    return _client_pool
@@ -0,0 +1,230 @@
+import os
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+from typing import Optional
+
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+from dotenv import load_dotenv
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+load_dotenv()
+
+HTML_EXTRACTOR = os.getenv("HTML_EXTRACTOR", "auto")
+
+SKIP_TAGS = {"script", "style", "nav", "noscript", "template", "svg", "iframe"}
+SKIP_ROLES = {"navigation", "search"}
+CODE_TAGS = {"pre"}
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "details", "div", "dl", "dt", "figcaption",
+    "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "ol",
+    "p", "section", "summary", "table", "td", "th", "tr", "ul",
+}
+
+
+class TextBuilder:
+    """Turns a stream of start/end/data events into page text in one pass.
+
+    Script, style and navigation content (including role="navigation" landmarks) is
+    skipped, prose is collapsed to one phrase per line, and <pre> blocks are kept
+    verbatim so code keeps its indentation.
+    """
+
+    def __init__(self):
+        self._skip = 0
+        self._skip_role_tag: Optional[str] = None
+        self._skip_role_depth = 0
+        self._code = 0
+        self._parts: list[str] = []
+        self._output: list[str] = []
+
+    def start(self, tag: str, attrib=None) -> None:
+        if self._skip_role_tag == tag:
+            self._skip_role_depth += 1
+        elif attrib and self._skip_role_tag is None and attrib.get("role") in SKIP_ROLES:
+            self._skip_role_tag = tag
+            self._skip_role_depth = 1
+            self._skip += 1
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif self._skip:
+            return
+        elif tag in CODE_TAGS:
+            if not self._code:
+                self._flush_prose()
+            self._code += 1
+        elif tag in BLOCK_TAGS and not self._code:
+            self._parts.append("\n")
+
+    def end(self, tag: str) -> None:
+        if self._skip_role_tag == tag:
+            self._skip_role_depth -= 1
+            if not self._skip_role_depth:
+                self._skip_role_tag = None
+                self._skip -= 1
+        if tag in SKIP_TAGS:
+            self._skip = max(self._skip - 1, 0)
+        elif self._skip:
+            return
+        elif tag in CODE_TAGS and self._code:
+            self._code -= 1
+            if not self._code:
+                self._flush_code()
+        elif tag in BLOCK_TAGS and not self._code:
+            self._parts.append("\n")
+
+    def data(self, data: str) -> None:
+        if not self._skip:
+            self._parts.append(data)
+
+    def close(self) -> str:
+        if self._code:
+            self._flush_code()
+        else:
+            self._flush_prose()
+        return "\n".join(self._output)
+
+    def _flush_prose(self) -> None:
+        text = "".join(self._parts)
+        self._parts = []
+        for line in text.splitlines():
+            for phrase in line.strip().split("  "):
+                phrase = phrase.strip()
+                if phrase:
+                    self._output.append(phrase)
+
+    def _flush_code(self) -> None:
+        lines = [line.rstrip() for line in "".join(self._parts).splitlines()]
+        self._parts = []
+        while lines and not lines[0]:
+            lines.pop(0)
+        while lines and not lines[-1]:
+            lines.pop()
+        if lines:
+            self._output.append("\n".join(lines))
+
+
+class TextExtractor(ABC):
+    name = "base"
+
+    @abstractmethod
+    def parser(self):
+        """Returns an incremental parser: call feed(text) any number of times, then close() for the text."""
+
+    def extract(self, html: str) -> str:
+        parser = self.parser()
+        parser.feed(html)
+        return parser.close()
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.builder = TextBuilder()
+
+    def handle_starttag(self, tag, attrs):
+        self.builder.start(tag, dict(attrs) if attrs else None)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.builder.start(tag)
+
+    def handle_endtag(self, tag):
+        self.builder.end(tag)
+
+    def handle_data(self, data):
+        self.builder.data(data)
+
+    def close(self) -> str:
+        super().close()
+        return self.builder.close()
+
+
+class HTMLParserExtractor(TextExtractor):
+    name = "html.parser"
+
+    def parser(self):
+        return _StdlibParser()
+
+
+class LxmlExtractor(TextExtractor):
+    name = "lxml"
+
+    def parser(self):
+        # The target receives parse events straight from libxml2, so no tree is built.
+        return etree.HTMLParser(target=TextBuilder(), remove_comments=True, remove_pis=True)
+
+
+class _SoupParser:
+    def __init__(self):
+        self._chunks: list[str] = []
+
+    def feed(self, data: str) -> None:
+        self._chunks.append(data)
+
+    def close(self) -> str:
+        builder = TextBuilder()
+        self._walk(BeautifulSoup("".join(self._chunks), "html.parser"), builder)
+        return builder.close()
+
+    def _walk(self, node: Tag, builder: TextBuilder) -> None:
+        for child in node.children:
+            if isinstance(child, Tag):
+                builder.start(child.name, child.attrs)
+                self._walk(child, builder)
+                builder.end(child.name)
+            elif type(child) in (NavigableString, CData):
+                builder.data(str(child))
+
+
+class BeautifulSoupExtractor(TextExtractor):
+    """Builds the full soup first; kept as the reference the faster backends are checked against."""
+
+    name = "bs4"
+
+    def parser(self):
+        return _SoupParser()
+
+
+class PlainTextParser:
+    """Same feed()/close() interface for text/plain responses, which need no markup parsing."""
+
+    def __init__(self):
+        self.builder = TextBuilder()
+
+    def feed(self, data: str) -> None:
+        self.builder.data(data)
+
+    def close(self) -> str:
+        return self.builder.close()
+
+
+_EXTRACTORS = {
+    LxmlExtractor.name: LxmlExtractor,
+    HTMLParserExtractor.name: HTMLParserExtractor,
+    BeautifulSoupExtractor.name: BeautifulSoupExtractor,
+}
+
+_html_extractor: Optional[TextExtractor] = None
+
+
+def available_extractors() -> list[str]:
+    return [name for name in _EXTRACTORS if name != LxmlExtractor.name or etree is not None]
+
+
+def create_extractor(name: str) -> TextExtractor:
+    if name == "auto":
+        name = LxmlExtractor.name if etree is not None else HTMLParserExtractor.name
+    if name not in available_extractors():
+        raise ValueError(f"Unknown or unavailable HTML_EXTRACTOR: {name}")
+    return _EXTRACTORS[name]()
+
+
+def get_html_extractor() -> TextExtractor:
+    global _html_extractor
+    if _html_extractor is None:
+        _html_extractor = create_extractor(HTML_EXTRACTOR)
+    return _html_extractor
@@ -0,0 +1,275 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; spans sub-millisecond cache and DB calls up to slow model answers.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class _HistogramSeries:
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects; one bisect and a lock per observation."""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: tuple = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.upper_bounds = tuple(buckets) + (float("inf"),)
+        self._series: dict[tuple, _HistogramSeries] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        if not METRICS_ENABLED:
+            return
+        index = bisect_left(self.upper_bounds, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = _HistogramSeries(len(self.upper_bounds))
+            series.buckets[index] += 1
+            series.sum += value
+            series.count += 1
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return series.count if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(
+                (labels, list(series.buckets), series.sum, series.count) for labels, series in self._series.items()
+            )
+        for labels, buckets, total, count in items:
+            cumulative = 0
+            for upper_bound, bucket in zip(self.upper_bounds, buckets):
+                cumulative += bucket
+                le = f'le="{_format_value(float(upper_bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class Registry:
+    """Metrics updated as work happens, plus collectors that snapshot existing stats() at scrape time."""
+
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: list[Callable[[], list[str]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], list[str]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+def stats_samples(prefix: str, series: Iterable[tuple[dict, Optional[dict]]], counters: Iterable[str] = ()) -> list[str]:
+    """Turns the numeric fields of stats() dicts into samples, one family per field.
+
+    `series` pairs a label dict with a stats dict; fields named in `counters` are
+    exported as counters and the rest as gauges.
+    """
+    counters = set(counters)
+    families: dict[str, tuple[str, list[str]]] = {}
+    for labels, stats in series:
+        label_text = _format_labels(tuple(labels), tuple(labels.values()))
+        for key, value in (stats or {}).items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if key in counters:
+                name, kind = (f"{prefix}_{key}" if key.endswith("_total") else f"{prefix}_{key}_total"), "counter"
+            else:
+                name, kind = f"{prefix}_{key}", "gauge"
+            families.setdefault(name, (kind, []))[1].append(f"{name}{label_text} {_format_value(value)}")
+    lines = []
+    for name, (kind, samples) in families.items():
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return lines
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "chatbot_stage_seconds", "Time spent in each stage of the chat pipeline.", ["stage"]
+))
+REPOSITORY_SECONDS = registry.register(Histogram(
+    "chatbot_repository_seconds", "Time spent in repository calls, including the database round trips.", ["method"]
+))
+HTTP_REQUEST_SECONDS = registry.register(Histogram(
+    "chatbot_http_request_seconds", "Time from request start until the response body is fully sent.",
+    ["method", "route", "status"]
+))
+ERRORS = registry.register(Counter(
+    "chatbot_errors_total", "Failures per pipeline stage, including ones the pipeline recovers from.", ["stage"]
+))
+CACHE_RESULTS = registry.register(Counter(
+    "chatbot_answer_cache_results_total", "First-turn answer lookups by outcome.", ["result"]
+))
+
+
+def timed(stage: str, histogram: Histogram = STAGE_SECONDS, count_errors: bool = True):
+    """Decorator recording a sync or async function's duration under `stage`, and its exceptions in ERRORS."""
+
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                except Exception:
+                    if count_errors:
+                        ERRORS.inc(stage)
+                    raise
+                finally:
+                    histogram.observe(time.perf_counter() - start, stage)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                if count_errors:
+                    ERRORS.inc(stage)
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start, stage)
+        return wrapper
+
+    return decorator
+
+
+def timed_methods(prefix: str):
+    """Class decorator timing every public method into REPOSITORY_SECONDS as "<prefix>.<method>"."""
+
+    def decorator(cls):
+        for name, member in list(vars(cls).items()):
+            if callable(member) and not name.startswith("_") and not isinstance(member, (staticmethod, classmethod)):
+                setattr(cls, name, timed(f"{prefix}.{name}", REPOSITORY_SECONDS, count_errors=False)(member))
+        return cls
+
+    return decorator
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request until its last body chunk, streamed responses included."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            # Label by route template, not raw path, so ids in URLs do not create new series.
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, scope["method"], path, str(status))
+
+
+def render_metrics() -> str:
+    return registry.render()
@@ -0,0 +1,233 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PAGE_CACHE_BACKEND = os.getenv("PAGE_CACHE_BACKEND", "memory")
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", "page_cache.sqlite3")
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "3600"))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_")
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = field(default_factory=time.time)
+
+    @property
+    def size(self) -> int:
+        return len(self.text.encode("utf-8"))
+
+    def is_fresh(self, ttl: int) -> bool:
+        return time.time() - self.fetched_at < ttl
+
+
+class PageCache(ABC):
+    """Cleaned page text keyed by normalized URL, bounded by total bytes with LRU eviction.
+
+    Async code calls the *_async methods; backends that touch disk set `blocking` so those
+    run in a worker thread instead of on the event loop.
+    """
+
+    blocking = False
+
+    def __init__(self, ttl: int = PAGE_CACHE_TTL, max_bytes: int = PAGE_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        page = self._get(normalize_url(url))
+        if page is None:
+            self.misses += 1
+        elif page.is_fresh(self.ttl):
+            self.hits += 1
+        else:
+            self.stale += 1
+        return page
+
+    def set(self, page: CachedPage) -> None:
+        if page.size > self.max_bytes:
+            return
+        self._set(normalize_url(page.url), page)
+
+    def revalidated(self, page: CachedPage) -> None:
+        self.revalidations += 1
+        page.fetched_at = time.time()
+        self._set(normalize_url(page.url), page)
+
+    async def get_async(self, url: str) -> Optional[CachedPage]:
+        return await asyncio.to_thread(self.get, url) if self.blocking else self.get(url)
+
+    async def set_async(self, page: CachedPage) -> None:
+        if self.blocking:
+            await asyncio.to_thread(self.set, page)
+        else:
+            self.set(page)
+
+    async def revalidated_async(self, page: CachedPage) -> None:
+        if self.blocking:
+            await asyncio.to_thread(self.revalidated, page)
+        else:
+            self.revalidated(page)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "stale": self.stale,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+            "bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+        }
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[CachedPage]:
+        ...
+
+    @abstractmethod
+    def _set(self, key: str, page: CachedPage) -> None:
+        ...
+
+    @abstractmethod
+    def total_bytes(self) -> int:
+        ...
+
+
+class MemoryPageCache(PageCache):
+    def __init__(self, ttl: int = PAGE_CACHE_TTL, max_bytes: int = PAGE_CACHE_MAX_BYTES):
+        super().__init__(ttl, max_bytes)
+        self._pages: OrderedDict[str, CachedPage] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[CachedPage]:
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+            return page
+
+    def _set(self, key: str, page: CachedPage) -> None:
+        with self._lock:
+            previous = self._pages.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._pages[key] = page
+            self._bytes += page.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._pages.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+    def total_bytes(self) -> int:
+        return self._bytes
+
+
+class SQLitePageCache(PageCache):
+    """On-disk backend; WAL mode lets several uvicorn workers share one file."""
+
+    blocking = True
+
+    def __init__(self, path: str = PAGE_CACHE_PATH, ttl: int = PAGE_CACHE_TTL, max_bytes: int = PAGE_CACHE_MAX_BYTES):
+        super().__init__(ttl, max_bytes)
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "key TEXT PRIMARY KEY, url TEXT NOT NULL, text TEXT NOT NULL, "
+                "etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_pages_accessed_at ON pages (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _get(self, key: str) -> Optional[CachedPage]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT url, text, etag, last_modified, fetched_at FROM pages WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return CachedPage(*row)
+
+    def _set(self, key: str, page: CachedPage) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, page.url, page.text, page.etag, page.last_modified, page.fetched_at, time.time(), page.size),
+            )
+            excess = self._total_bytes(conn) - self.max_bytes
+            if excess > 0:
+                evicted = 0
+                for evict_key, size in conn.execute("SELECT key, size FROM pages ORDER BY accessed_at").fetchall():
+                    if excess <= 0:
+                        break
+                    conn.execute("DELETE FROM pages WHERE key = ?", (evict_key,))
+                    excess -= size
+                    evicted += 1
+                self.evictions += evicted
+
+    def _total_bytes(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def total_bytes(self) -> int:
+        return self._total_bytes(self._connect())
+
+
+_page_cache: Optional[PageCache] = None
+
+
+def get_page_cache() -> Optional[PageCache]:
+    global _page_cache
+    if _page_cache is None:
+        if PAGE_CACHE_BACKEND == "sqlite":
+            _page_cache = SQLitePageCache()
+        elif PAGE_CACHE_BACKEND == "memory":
+            _page_cache = MemoryPageCache()
+    return _page_cache
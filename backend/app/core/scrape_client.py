@@ -0,0 +1,132 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from dotenv import load_dotenv
+
+try:
+    import h2  # noqa: F401  (httpx only needs it to be importable)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+load_dotenv()
+
+SCRAPE_TIMEOUT = float(os.getenv("SCRAPE_TIMEOUT", "10"))
+SCRAPE_MAX_IN_FLIGHT = int(os.getenv("SCRAPE_MAX_IN_FLIGHT", "256"))
+SCRAPE_MAX_PER_HOST = int(os.getenv("SCRAPE_MAX_PER_HOST", "8"))
+# httpcore scans every pooled connection for each waiting request, so a large idle pool
+# costs CPU under load; a few dozen warm connections cover the hosts we actually revisit.
+SCRAPE_MAX_KEEPALIVE = int(os.getenv("SCRAPE_MAX_KEEPALIVE", "32"))
+SCRAPE_KEEPALIVE_EXPIRY = float(os.getenv("SCRAPE_KEEPALIVE_EXPIRY", "30"))
+SCRAPE_HTTP2 = os.getenv("SCRAPE_HTTP2", "auto")
+
+
+class _HostSlots:
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0
+
+
+class ScrapeClient:
+    """Shared HTTP client for scraping: one keep-alive pool, a global in-flight cap and a cap per host.
+
+    The connection pool is sized to the in-flight cap, so requests wait on our semaphores
+    (cheap) rather than queueing inside httpcore's pool, which slows down badly when long.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = SCRAPE_MAX_IN_FLIGHT,
+        max_per_host: int = SCRAPE_MAX_PER_HOST,
+        max_keepalive: int = SCRAPE_MAX_KEEPALIVE,
+        keepalive_expiry: float = SCRAPE_KEEPALIVE_EXPIRY,
+        timeout: float = SCRAPE_TIMEOUT,
+        http2: Optional[bool] = None,
+    ):
+        if http2 is None:
+            http2 = HTTP2_AVAILABLE if SCRAPE_HTTP2 == "auto" else SCRAPE_HTTP2.lower() in ("1", "true", "yes")
+        self.max_in_flight = max_in_flight
+        self.max_per_host = max_per_host
+        self.http2 = http2
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            follow_redirects=True,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_in_flight,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._hosts: dict[str, _HostSlots] = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.waited_global = 0
+        self.waited_host = 0
+
+    @asynccontextmanager
+    async def stream(self, url: str, headers: dict = None) -> AsyncIterator[httpx.Response]:
+        host = urlsplit(url).netloc.lower()
+        slots = self._hosts.get(host)
+        if slots is None:
+            slots = self._hosts[host] = _HostSlots(self.max_per_host)
+        slots.users += 1
+        try:
+            # Take the host slot first so a busy host does not tie up global slots.
+            if slots.semaphore.locked():
+                self.waited_host += 1
+            async with slots.semaphore:
+                if self._slots.locked():
+                    self.waited_global += 1
+                async with self._slots:
+                    self.requests += 1
+                    self.in_flight += 1
+                    self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                    try:
+                        async with self.client.stream("GET", url, headers=headers) as response:
+                            yield response
+                    finally:
+                        self.in_flight -= 1
+        finally:
+            slots.users -= 1
+            if not slots.users:
+                self._hosts.pop(host, None)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "http2": self.http2,
+            "max_in_flight": self.max_in_flight,
+            "max_per_host": self.max_per_host,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "requests": self.requests,
+            "waited_global": self.waited_global,
+            "waited_host": self.waited_host,
+            "active_hosts": len(self._hosts),
+        }
+
+
+_scrape_client: Optional[ScrapeClient] = None
+
+
+def get_scrape_client() -> ScrapeClient:
+    global _scrape_client
+    if _scrape_client is None:
+        _scrape_client = ScrapeClient()
+    return _scrape_client
+
+
+async def close_scrape_client() -> None:
+    global _scrape_client
+    if _scrape_client is not None:
+        await _scrape_client.aclose()
+        _scrape_client = None
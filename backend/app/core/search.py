@@ -0,0 +1,153 @@
+import asyncio
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+from duckduckgo_search import DDGS
+
+from app.core.ttl_cache import TTLCache
+
+load_dotenv()
+
+SEARCH_PROVIDER = os.getenv("SEARCH_PROVIDER", "duckduckgo")
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "900"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+# SEARCH_PROVIDER=static: a JSON list of {"href", "title", "body"} results returned for every query.
+SEARCH_STATIC_FILE = os.getenv("SEARCH_STATIC_FILE", "")
+SEARCH_STATIC_LATENCY = float(os.getenv("SEARCH_STATIC_LATENCY", "0"))
+
+STOPWORDS = {
+    "a", "an", "and", "are", "can", "do", "does", "for", "how", "i", "in", "is", "it",
+    "me", "my", "of", "on", "or", "please", "the", "to", "what", "with", "you",
+}
+
+_WORD_RE = re.compile(r"[\w.+#-]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased words, keeping "list.sort", "c++" and "c#" whole but not a sentence's final "." or a lone "-"."""
+    words = (word.strip(".-") for word in _WORD_RE.findall(text.lower()))
+    return [word for word in words if word]
+
+
+def normalize_query(query: str) -> str:
+    words = tokenize(query)
+    significant = [word for word in words if word not in STOPWORDS]
+    return " ".join(significant or words)
+
+
+class SearchProvider(ABC):
+    name = "base"
+
+    @abstractmethod
+    async def search(self, query: str, max_results: int) -> list[dict]:
+        ...
+
+
+class DuckDuckGoSearchProvider(SearchProvider):
+    name = "duckduckgo"
+
+    def _search(self, query: str, max_results: int) -> list[dict]:
+        with DDGS() as ddgs:
+            return list(ddgs.text(query, max_results=max_results))
+
+    async def search(self, query: str, max_results: int) -> list[dict]:
+        return await asyncio.to_thread(self._search, query, max_results)
+
+
+class StaticSearchProvider(SearchProvider):
+    """Returns the same canned results for every query; meant for tests and benchmarks."""
+
+    name = "static"
+
+    def __init__(self, results: list[dict], latency: float = 0.0):
+        self.results = results
+        self.latency = latency
+        self.calls = 0
+
+    @classmethod
+    def from_config(cls) -> "StaticSearchProvider":
+        if not SEARCH_STATIC_FILE:
+            raise ValueError("SEARCH_PROVIDER=static needs SEARCH_STATIC_FILE")
+        with open(SEARCH_STATIC_FILE, encoding="utf-8") as f:
+            return cls(json.load(f), latency=SEARCH_STATIC_LATENCY)
+
+    async def search(self, query: str, max_results: int) -> list[dict]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.results[:max_results]
+
+
+class SearchCache:
+    """TTL-bounded search results keyed by normalized query, with concurrent misses coalesced."""
+
+    def __init__(self, maxsize: int = SEARCH_CACHE_MAX_ENTRIES, ttl: float = SEARCH_CACHE_TTL):
+        self._results = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: dict[tuple[str, int], asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def get_or_fetch(
+        self, query: str, max_results: int, fetch: Callable[[], Awaitable[list[dict]]]
+    ) -> list[dict]:
+        key = (normalize_query(query), max_results)
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._fetch(key, fetch))
+            self._inflight[key] = inflight
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(inflight)
+
+    async def _fetch(self, key: tuple[str, int], fetch: Callable[[], Awaitable[list[dict]]]) -> list[dict]:
+        try:
+            results = await fetch()
+            if results:
+                self._results.set(key, results)
+            return results
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        self._results.clear()
+
+    def stats(self) -> dict:
+        return {**self._results.stats(), "coalesced": self.coalesced, "inflight": len(self._inflight)}
+
+
+_PROVIDERS = {
+    DuckDuckGoSearchProvider.name: DuckDuckGoSearchProvider,
+    StaticSearchProvider.name: StaticSearchProvider.from_config,
+}
+
+_search_provider: Optional[SearchProvider] = None
+_search_cache: Optional[SearchCache] = None
+
+
+def get_search_provider() -> SearchProvider:
+    global _search_provider
+    if _search_provider is None:
+        if SEARCH_PROVIDER not in _PROVIDERS:
+            raise ValueError(f"Unknown SEARCH_PROVIDER: {SEARCH_PROVIDER}")
+        _search_provider = _PROVIDERS[SEARCH_PROVIDER]()
+    return _search_provider
+
+
+def set_search_provider(provider: SearchProvider) -> None:
+    global _search_provider
+    _search_provider = provider
+    get_search_cache().clear()
+
+
+def get_search_cache() -> SearchCache:
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = SearchCache()
+    return _search_cache
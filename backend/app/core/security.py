@@ -1,15 +1,22 @@
 import base64
+import functools
+import hashlib
 import os
 import bcrypt
 import secrets
 import string
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.argon2 import Argon2id
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import jwt
 from dotenv import load_dotenv
 
+from app.core.metrics import ERRORS, timed
+from app.core.ttl_cache import TTLCache
+
 load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -19,9 +26,15 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+DECRYPT_CACHE_TTL = int(os.getenv("DECRYPT_CACHE_TTL", "300"))
+DECRYPT_CACHE_SIZE = int(os.getenv("DECRYPT_CACHE_SIZE", "1024"))
+ENCRYPTION_SALT = os.getenv("ENCRYPTION_SALT", "PythonChatBot/master-key/v2").encode()
 
+CIPHERTEXT_VERSION = "v2"
+_RECORD_KEY_INFO = b"PythonChatBot/record-key/v2"
 
-def _derive_key(password: str, salt: bytes) -> bytes:
+
+def _argon2id(password: str, salt: bytes) -> bytes:
     kdf = Argon2id(
         salt=salt,
         length=32,
@@ -29,7 +42,24 @@ def _derive_key(password: str, salt: bytes) -> bytes:
         lanes=4,
         memory_cost=65536,
     )
-    return base64.urlsafe_b64encode(kdf.derive(password.encode()))
+    return kdf.derive(password.encode())
+
+def _derive_key(password: str, salt: bytes) -> bytes:
+    return base64.urlsafe_b64encode(_argon2id(password, salt))
+
+@functools.lru_cache(maxsize=4)
+def _master_key(password: str) -> bytes:
+    return _argon2id(password, ENCRYPTION_SALT)
+
+def load_master_key() -> None:
+    _master_key(SECRET_KEY)
+
+def _record_key(password: str, salt: bytes) -> bytes:
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=_RECORD_KEY_INFO)
+    return base64.urlsafe_b64encode(hkdf.derive(_master_key(password)))
+
+def is_legacy_ciphertext(encrypted_string: Optional[str]) -> bool:
+    return bool(encrypted_string) and not encrypted_string.startswith(f"{CIPHERTEXT_VERSION}.")
 
 def encrypt_data(data: str, password: str) -> str:
     if not data:
@@ -37,7 +67,7 @@ def encrypt_data(data: str, password: str) -> str:
 
     salt = os.urandom(16)
     
-    key = _derive_key(password, salt)
+    key = _record_key(password, salt)
     f = Fernet(key)
     
     token = f.encrypt(data.encode())
@@ -45,32 +75,77 @@ def encrypt_data(data: str, password: str) -> str:
     salt_b64 = base64.urlsafe_b64encode(salt).decode()
     token_str = token.decode()
     
-    return f"{salt_b64}.{token_str}"
+    return f"{CIPHERTEXT_VERSION}.{salt_b64}.{token_str}"
 
+@timed("decrypt")
 def decrypt_data(encrypted_string: str, password: str) -> str:
     if not encrypted_string:
         return None
     
     try:
-        salt_b64, token_str = encrypted_string.split(".")
-        salt = base64.urlsafe_b64decode(salt_b64)
+        if is_legacy_ciphertext(encrypted_string):
+            # Pre-v2 values are "salt.token" with a full Argon2id run per record.
+            salt_b64, token_str = encrypted_string.split(".")
+            key = _derive_key(password, base64.urlsafe_b64decode(salt_b64))
+        else:
+            _, salt_b64, token_str = encrypted_string.split(".")
+            key = _record_key(password, base64.urlsafe_b64decode(salt_b64))
 
-        
-        key = _derive_key(password, salt)
         f = Fernet(key)
         
         return f.decrypt(token_str.encode()).decode()
     except Exception as e:
+        ERRORS.inc("decrypt")
         print(f"Decryption failed: {e}")
         return None
 
+def _zero_secret(key: str, secret: bytearray) -> None:
+    secret[:] = bytes(len(secret))
+
+_decrypted_cache = TTLCache(maxsize=DECRYPT_CACHE_SIZE, ttl=DECRYPT_CACHE_TTL, on_evict=_zero_secret)
+
+def _decrypt_cache_key(encrypted_string: str, password: str) -> str:
+    return hashlib.sha256(f"{password}\x00{encrypted_string}".encode()).hexdigest()
+
+def decrypt_data_cached(encrypted_string: str, password: str) -> str:
+    if not encrypted_string:
+        return None
+
+    key = _decrypt_cache_key(encrypted_string, password)
+    secret = _decrypted_cache.get(key)
+    if secret is not None:
+        plain = secret.decode()
+        # An entry zeroed by a concurrent eviction reads back as NUL bytes; treat it as a miss.
+        if "\x00" not in plain:
+            return plain
+
+    plain = decrypt_data(encrypted_string, password)
+    if plain is not None:
+        _decrypted_cache.set(key, bytearray(plain.encode()))
+    return plain
 
+def invalidate_decrypted(encrypted_string: Optional[str], password: str) -> None:
+    if encrypted_string:
+        _decrypted_cache.pop(_decrypt_cache_key(encrypted_string, password))
+
+def decrypt_cache_stats() -> dict:
+    return _decrypted_cache.stats()
+
+
+@timed("password_verify")
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+@timed("password_hash")
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
 
+def security_stamp(password_hash: str) -> str:
+    return hashlib.sha256(password_hash.encode()).hexdigest()[:16]
+
+def user_token_claims(user) -> dict:
+    return {"sub": user.username, "uid": user.id, "sv": security_stamp(user.password_hash)}
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
 
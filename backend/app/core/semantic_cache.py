@@ -0,0 +1,351 @@
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.core.answer_cache import CachedAnswer
+from app.core.context_ranking import stem
+from app.core.search import normalize_query
+
+load_dotenv()
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.8"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "86400"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "100000"))
+SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH", "semantic_cache")
+SEMANTIC_CACHE_SAVE_EVERY = int(os.getenv("SEMANTIC_CACHE_SAVE_EVERY", "50"))
+SEMANTIC_CACHE_DIM = int(os.getenv("SEMANTIC_CACHE_DIM", "256"))
+
+# Every question here is about Python, so the word itself says nothing about which one.
+DOMAIN_STOPWORDS = {"python", "python3", "py"}
+
+
+class Embedder(ABC):
+    name = "base"
+    dim = 0
+
+    @abstractmethod
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Returns a (len(texts), dim) float32 matrix of L2-normalized rows."""
+
+
+class HashingEmbedder(Embedder):
+    """Deterministic bag of words and character trigrams, hashed into `dim` signed buckets.
+
+    crc32 rather than hash() keeps vectors stable across processes, so a saved index stays valid.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = SEMANTIC_CACHE_DIM):
+        self.dim = dim
+
+    def _features(self, text: str) -> list[tuple[str, float]]:
+        words = [stem(word) for word in normalize_query(text).split() if word not in DOMAIN_STOPWORDS]
+        padded = f" {' '.join(words)} "
+        # Word pairs keep order ("string to int" vs "int to string"); trigrams only smooth
+        # over spelling variants, so they get less weight than whole words.
+        return (
+            [(word, 1.0) for word in words]
+            + [(f"{first}>{second}", 1.5) for first, second in zip(words, words[1:])]
+            + [(padded[i:i + 3], 0.5) for i in range(len(padded) - 2)]
+        )
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                digest = zlib.crc32(feature.encode("utf-8"))
+                vectors[row, digest % self.dim] += weight if digest & 0x80000000 else -weight
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class SemanticCache:
+    """Answers to first-turn questions looked up by cosine similarity of their query embeddings.
+
+    Vectors are split between a read-only base matrix, memory-mapped from the last save,
+    and an in-memory tail that grows by doubling; lookups score both with one matrix
+    product each. On disk, `{path}.jsonl` holds a header line naming the raw float32
+    vector file, then one entry per line. Saving appends only the rows added since the
+    last save to both files and maps the longer vector file; after rows were dropped
+    (trimmed or expired) it writes a new vector file and swaps in a new `.jsonl` instead.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        embedder: Embedder = None,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl: float = SEMANTIC_CACHE_TTL,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        path: Optional[str] = SEMANTIC_CACHE_PATH,
+        save_every: int = SEMANTIC_CACHE_SAVE_EVERY,
+    ):
+        self.namespace = namespace
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.save_every = save_every
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._base = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self._tail = np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self._tail_count = 0
+        self._entries: list[dict] = []
+        self._generation = 0
+        self._unsaved = 0
+        # Leading rows of self._entries already in the files; None when they must be rewritten.
+        self._saved: Optional[int] = None
+        self._vectors_file: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+        if path:
+            self.load()
+
+    def _meta(self) -> dict:
+        return {"namespace": self.namespace, "embedder": self.embedder.name, "dim": self.embedder.dim}
+
+    def _entries_file(self) -> str:
+        return f"{self.path}.jsonl"
+
+    def _map(self, rows: int) -> np.ndarray:
+        if not rows:
+            return np.zeros((0, self.embedder.dim), dtype=np.float32)
+        return np.memmap(self._vectors_file, dtype=np.float32, mode="r", shape=(rows, self.embedder.dim))
+
+    def load(self) -> None:
+        try:
+            with open(self._entries_file(), encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("meta") != self._meta():
+                    print("Semantic cache on disk was built for another model, prompt or embedder; starting empty")
+                    return
+                entries = []
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        break  # the last line of a save that was cut short
+            vectors_file = os.path.join(os.path.dirname(os.path.abspath(self.path)), header["vectors"])
+            stored_bytes = os.path.getsize(vectors_file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Failed to load semantic cache: {e}")
+            return
+        # Both files grow from the same row, so their common prefix is consistent.
+        row_bytes = 4 * self.embedder.dim
+        rows = min(stored_bytes // row_bytes, len(entries))
+        with self._lock:
+            self._vectors_file = vectors_file
+            self._base = self._map(rows)
+            self._tail_count = 0
+            self._entries = entries[:rows]
+            self._generation += 1
+            self._saved = rows if stored_bytes == len(entries) * row_bytes else None
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                generation = self._generation
+                start = self._saved
+                vectors = self._vectors(start or 0)
+                entries = self._entries[start or 0:]
+                unsaved, self._unsaved = self._unsaved, 0
+            try:
+                if start is None:
+                    self._rewrite(vectors, entries)
+                else:
+                    self._append(vectors, entries)
+                base = self._map((start or 0) + len(entries))
+            except (OSError, ValueError) as e:
+                print(f"Failed to save semantic cache: {e}")
+                with self._lock:
+                    self._unsaved += unsaved
+                    # The files may hold part of this save now; only a rewrite is safe.
+                    self._saved = None
+                return
+            with self._lock:
+                if generation != self._generation:
+                    return  # rows were dropped meanwhile, so the next save rewrites anyway
+                # Keep whatever was appended to the tail while the files were being written.
+                added = self._vectors(len(base))
+                self._base = base
+                self._tail_count = 0
+                self._append_tail(added)
+                self._saved = len(base)
+
+    def _append(self, vectors: np.ndarray, entries: list[dict]) -> None:
+        with open(self._vectors_file, "ab") as f:
+            np.asarray(vectors, dtype=np.float32).tofile(f)
+        with open(self._entries_file(), "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(entry) + "\n" for entry in entries)
+
+    def _rewrite(self, vectors: np.ndarray, entries: list[dict]) -> None:
+        # A new vector file each time, so readers that still map the old one are unaffected;
+        # swapping in the .jsonl that names it switches both files at once.
+        directory = os.path.dirname(os.path.abspath(self.path))
+        prefix = os.path.basename(self.path)
+        fd, vectors_file = tempfile.mkstemp(prefix=f"{prefix}.", suffix=".f32", dir=directory)
+        entries_tmp = None
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.asarray(vectors, dtype=np.float32).tofile(f)
+            fd, entries_tmp = tempfile.mkstemp(prefix=prefix, suffix=".jsonl.tmp", dir=directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"meta": self._meta(), "vectors": os.path.basename(vectors_file)}) + "\n")
+                f.writelines(json.dumps(entry) + "\n" for entry in entries)
+            os.replace(entries_tmp, self._entries_file())
+        except OSError:
+            for path in (vectors_file, entries_tmp):
+                if path:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            raise
+        previous, self._vectors_file = self._vectors_file, vectors_file
+        if previous:
+            try:
+                os.remove(previous)
+            except OSError:
+                pass  # still mapped somewhere that cannot unlink open files; left behind
+
+    def _vectors(self, start: int = 0) -> np.ndarray:
+        """Rows from `start` on; tail rows are copied, as adds after a trim overwrite them in place."""
+        tail = self._tail[max(start - len(self._base), 0):self._tail_count]
+        if start >= len(self._base):
+            return tail.copy()
+        if not self._tail_count:
+            return self._base[start:]
+        return np.concatenate([self._base[start:], tail])
+
+    def _append_tail(self, vectors: np.ndarray) -> None:
+        needed = self._tail_count + len(vectors)
+        if needed > len(self._tail):
+            grown = np.zeros((max(needed, 2 * len(self._tail), 64), self.embedder.dim), dtype=np.float32)
+            grown[:self._tail_count] = self._tail[:self._tail_count]
+            self._tail = grown
+        self._tail[self._tail_count:needed] = vectors
+        self._tail_count = needed
+
+    def _scores(self, vectors: np.ndarray) -> np.ndarray:
+        """(len(vectors), len(self)) cosine similarities; rows are already unit length."""
+        return np.concatenate([vectors @ self._base.T, vectors @ self._tail[:self._tail_count].T], axis=1)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expired(self, now: float) -> int:
+        """How many of the oldest entries are past the TTL; entries are kept in creation order."""
+        return bisect.bisect_left(self._entries, now - self.ttl, key=lambda entry: entry["created_at"])
+
+    def _drop_oldest(self, count: int) -> None:
+        self._base = np.ascontiguousarray(self._vectors(count))
+        self._tail_count = 0
+        self._entries = self._entries[count:]
+        self._generation += 1
+        self._saved = None
+
+    def lookup(self, query: str) -> Optional[tuple[CachedAnswer, float]]:
+        vector = self.embedder.embed([query])
+        with self._lock:
+            if not self._entries:
+                self.misses += 1
+                return None
+            scores = self._scores(vector)[0]
+            scores[:self._expired(time.time())] = -np.inf
+            index = int(np.argmax(scores))
+            score = float(scores[index])
+            entry = self._entries[index]
+            if score < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.latency_saved += entry["latency"]
+        return CachedAnswer(entry["response"], entry["sources"], entry["latency"]), score
+
+    def lookup_batch(self, queries: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Best entry index and similarity for each query, without threshold or TTL checks."""
+        vectors = self.embedder.embed(queries)
+        with self._lock:
+            if not self._entries:
+                return np.full(len(queries), -1), np.zeros(len(queries), dtype=np.float32)
+            scores = self._scores(vectors)
+        best = np.argmax(scores, axis=1)
+        return best, scores[np.arange(len(queries)), best]
+
+    def add(self, query: str, answer: CachedAnswer) -> None:
+        self.add_batch([query], [answer])
+
+    def add_batch(self, queries: list[str], answers: list[CachedAnswer]) -> None:
+        vectors = self.embedder.embed(queries)
+        with self._lock:
+            # Taken under the lock and never behind the last entry, so creation order holds.
+            now = max(time.time(), self._entries[-1]["created_at"]) if self._entries else time.time()
+            expired = self._expired(now)
+            # Expired rows would only shadow a re-added question; drop them once they are a
+            # tenth of the cache, so a steady trickle of expiries does not copy it on every add.
+            if expired and expired >= len(self._entries) // 10:
+                self._drop_oldest(expired)
+            self._append_tail(vectors)
+            self._entries.extend(
+                {"query": query, "response": answer.response, "sources": answer.sources,
+                 "latency": answer.latency, "created_at": now}
+                for query, answer in zip(queries, answers)
+            )
+            if len(self._entries) > self.max_entries:
+                # Drop the oldest tenth in one go so trimming is not a full copy per insert.
+                self._drop_oldest(len(self._entries) - self.max_entries + self.max_entries // 10)
+            self._unsaved += len(queries)
+            should_save = self.path and self.save_every and self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "embedder": self.embedder.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "latency_saved_seconds": round(self.latency_saved, 3),
+            "memory_mapped_entries": len(self._base) if isinstance(self._base, np.memmap) else 0,
+        }
+
+
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache(namespace: str) -> Optional[SemanticCache]:
+    global _semantic_cache
+    if _semantic_cache is None and SEMANTIC_CACHE_ENABLED:
+        _semantic_cache = SemanticCache(namespace)
+    return _semantic_cache
+
+
+def save_semantic_cache() -> None:
+    if _semantic_cache is not None:
+        _semantic_cache.save()
+
+
+def get_semantic_cache_stats() -> Optional[dict]:
+    return _semantic_cache.stats() if _semantic_cache is not None else None
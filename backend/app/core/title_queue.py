@@ -0,0 +1,214 @@
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+
+from app.core.chat_agent import ChatAgent
+from app.core.tracing import detach, span
+from app.repository.chat_repository import ChatRepository
+from app.repository.db import SessionLocal, bind_user
+
+load_dotenv()
+
+TITLE_QUEUE_SIZE = int(os.getenv("TITLE_QUEUE_SIZE", "1000"))
+TITLE_WORKERS = int(os.getenv("TITLE_WORKERS", "2"))
+TITLE_MAX_ATTEMPTS = int(os.getenv("TITLE_MAX_ATTEMPTS", "3"))
+TITLE_RETRY_DELAY = float(os.getenv("TITLE_RETRY_DELAY", "2"))
+
+DEFAULT_TITLES = ("New Chat", "Nowy czat")
+
+
+@dataclass
+class TitleJob:
+    user_id: int
+    conversation_id: int
+    api_key: str
+    query: str
+    response_text: str
+    attempts: int = 0
+
+
+class TitleEvents:
+    """Fan-out of title updates to each user's open /chat/events streams."""
+
+    def __init__(self, max_pending: int = 100):
+        self.max_pending = max_pending
+        self._subscribers: dict[int, set[asyncio.Queue]] = {}
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.max_pending)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(user_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[user_id]
+
+    def publish(self, user_id: int, event: dict) -> None:
+        for queue in self._subscribers.get(user_id, ()):
+            if not queue.full():
+                queue.put_nowait(event)
+
+    def __len__(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+class TitleQueue:
+    """Bounded in-process queue of title jobs drained by a few worker tasks.
+
+    `generate(job)` produces the title and `store(job, title)` persists it, returning False
+    when the conversation is gone or was renamed meanwhile. Failed jobs are retried with
+    a linear backoff; when the queue is full new jobs are dropped and the conversation
+    keeps its default title, so its next message enqueues it again.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[TitleJob], Awaitable[str]],
+        store: Callable[[TitleJob, str], Awaitable[bool]],
+        events: TitleEvents,
+        maxsize: int = TITLE_QUEUE_SIZE,
+        workers: int = TITLE_WORKERS,
+        max_attempts: int = TITLE_MAX_ATTEMPTS,
+        retry_delay: float = TITLE_RETRY_DELAY,
+    ):
+        self.generate = generate
+        self.store = store
+        self.events = events
+        self.maxsize = maxsize
+        self.worker_count = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._pending: set[int] = set()
+        self.enqueued = 0
+        self.dropped = 0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # First use, or the previous loop is gone (e.g. a restarted test client).
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._workers = []
+            self._pending.clear()
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._work()) for _ in range(self.worker_count)]
+
+    def enqueue(self, job: TitleJob) -> bool:
+        self._ensure_started()
+        if job.conversation_id in self._pending:
+            return True
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print(f"Title queue full, skipping conversation {job.conversation_id}")
+            return False
+        self._pending.add(job.conversation_id)
+        self.enqueued += 1
+        return True
+
+    async def _work(self) -> None:
+        # Workers are created inside whichever request first enqueued; do not parent every job to it.
+        detach()
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: TitleJob) -> None:
+        job.attempts += 1
+        with span("title.generate", conversation_id=job.conversation_id, attempt=job.attempts) as s:
+            try:
+                title = await self.generate(job)
+                if await self.store(job, title):
+                    self.events.publish(job.user_id, {"conversation_id": job.conversation_id, "title": title})
+                self.completed += 1
+            except Exception as e:
+                s.record_exception(e)
+                if job.attempts < self.max_attempts:
+                    self.retried += 1
+                    print(f"Title generation for conversation {job.conversation_id} failed ({e}), retrying")
+                    asyncio.get_running_loop().call_later(self.retry_delay * job.attempts, self._requeue, job)
+                    return
+                self.failed += 1
+                print(f"Title generation for conversation {job.conversation_id} failed: {e}")
+        self._pending.discard(job.conversation_id)
+
+    def _requeue(self, job: TitleJob) -> None:
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            self._pending.discard(job.conversation_id)
+
+    async def join(self) -> None:
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self._loop = None
+        self._pending.clear()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "maxsize": self.maxsize,
+            "workers": len(self._workers),
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "subscribers": len(self.events),
+        }
+
+
+async def _generate_title(job: TitleJob) -> str:
+    title = await ChatAgent(api_key=job.api_key).generate_title(job.query, job.response_text)
+    if not title:
+        raise ValueError("empty title")
+    return title
+
+
+def _store_title_sync(job: TitleJob, title: str) -> bool:
+    with SessionLocal() as db:
+        bind_user(db, job.user_id)
+        return ChatRepository(db).replace_default_title(job.user_id, job.conversation_id, title, DEFAULT_TITLES)
+
+
+async def _store_title(job: TitleJob, title: str) -> bool:
+    return await asyncio.to_thread(_store_title_sync, job, title)
+
+
+_title_queue: Optional[TitleQueue] = None
+
+
+def get_title_queue() -> TitleQueue:
+    global _title_queue
+    if _title_queue is None:
+        _title_queue = TitleQueue(_generate_title, _store_title, TitleEvents())
+    return _title_queue
+
+
+async def stop_title_queue() -> None:
+    if _title_queue is not None:
+        await _title_queue.stop()
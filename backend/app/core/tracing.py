@@ -0,0 +1,409 @@
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# none | jsonl | otlp
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+# Share of requests exported; requests carrying a sampled W3C traceparent are always exported.
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+# Also export any trace whose root took at least this long, whatever the ratio; 0 turns it off.
+TRACING_SLOW_SECONDS = float(os.getenv("TRACING_SLOW_SECONDS", "0"))
+TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "python-chatbot")
+TRACING_FLUSH_SECONDS = float(os.getenv("TRACING_FLUSH_SECONDS", "2"))
+
+TRACING_ENABLED = TRACING_EXPORTER in ("jsonl", "otlp")
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class _Trace:
+    """Spans of one trace finished in this process, held until the root span ends and decides sampling."""
+
+    __slots__ = ("spans", "sampled", "decided", "lock")
+
+    def __init__(self, sampled: bool):
+        self.spans: list[Span] = []
+        self.sampled = sampled
+        self.decided = False
+        self.lock = threading.Lock()
+
+
+class Span:
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind", "attributes", "start_ns", "end_ns",
+        "status", "status_message", "is_root", "_trace", "_token",
+    )
+
+    def __init__(self, name: str, trace: _Trace, trace_id: str, parent_id: Optional[str], kind: int, attributes: dict):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.status = 0
+        self.status_message = ""
+        self.is_root = False
+        self._trace = trace
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def record_exception(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self._trace.sampled else '00'}"
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": self.status, "message": self.status_message} if self.status else {},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    trace_id = span_id = ""
+    traceparent = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, error: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonLinesExporter:
+    """Appends one OTLP/JSON ExportTraceServiceRequest per line, the format the collector's
+    file exporter writes and its otlpjsonfile receiver reads back."""
+
+    def __init__(self, path: str = TRACING_FILE):
+        self.path = path
+
+    def export(self, payload: dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload, separators=(",", ":")) + "\n")
+
+    def close(self) -> None:
+        pass
+
+
+class OtlpHttpExporter:
+    """POSTs OTLP/JSON to a collector's /v1/traces endpoint."""
+
+    def __init__(self, endpoint: str = TRACING_OTLP_ENDPOINT, timeout: float = 5):
+        self.endpoint = endpoint
+        self.client = httpx.Client(timeout=timeout)
+
+    def export(self, payload: dict) -> None:
+        response = self.client.post(self.endpoint, json=payload)
+        response.raise_for_status()
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class SpanProcessor:
+    """Batches finished traces on a background thread so exporting never runs on the request path."""
+
+    def __init__(self, exporter, flush_seconds: float = TRACING_FLUSH_SECONDS, max_queue: int = 10000):
+        self.exporter = exporter
+        self.flush_seconds = flush_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+        self._thread.start()
+
+    def submit(self, spans: list[Span]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += len(spans)
+
+    def _run(self) -> None:
+        while True:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                continue
+            while item is not None:
+                batch.extend(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._export(batch)
+            if item is None:
+                return
+
+    def _export(self, spans: list[Span]) -> None:
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACING_SERVICE_NAME}}]},
+                "scopeSpans": [{"scope": {"name": "app"}, "spans": [span.to_otlp() for span in spans]}],
+            }]
+        }
+        try:
+            self.exporter.export(payload)
+            self.exported += len(spans)
+        except Exception as e:
+            self.failed += len(spans)
+            print(f"Trace export failed: {e}")
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+        self.exporter.close()
+
+    def stats(self) -> dict:
+        return {"exported": self.exported, "dropped": self.dropped, "failed": self.failed, "queued": self._queue.qsize()}
+
+
+_processor: Optional[SpanProcessor] = None
+_processor_lock = threading.Lock()
+
+
+def get_span_processor() -> Optional[SpanProcessor]:
+    global _processor
+    if _processor is None and TRACING_ENABLED:
+        with _processor_lock:
+            if _processor is None:
+                exporter = JsonLinesExporter() if TRACING_EXPORTER == "jsonl" else OtlpHttpExporter()
+                _processor = SpanProcessor(exporter)
+    return _processor
+
+
+def shutdown_tracing() -> None:
+    global _processor
+    if _processor is not None:
+        _processor.shutdown()
+        _processor = None
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[tuple[str, str, bool]]:
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header, or None if malformed."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or parts[1] == "0" * 32:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+
+def detach() -> None:
+    """Starts the calling task without a parent span, e.g. a long-lived worker created during a request."""
+    _current_span.set(None)
+
+
+def start_span(
+    name: str, kind: int = SPAN_KIND_INTERNAL, attributes: dict = None, traceparent: Optional[str] = None
+):
+    if not TRACING_ENABLED:
+        return NOOP_SPAN
+    parent = _current_span.get()
+    if parent is not None:
+        span = Span(name, parent._trace, parent.trace_id, parent.span_id, kind, attributes or {})
+    else:
+        remote = parse_traceparent(traceparent)
+        if remote is not None:
+            trace_id, parent_id, sampled = remote
+            sampled = sampled or random.random() < TRACING_SAMPLE_RATIO
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+            sampled = random.random() < TRACING_SAMPLE_RATIO
+        span = Span(name, _Trace(sampled), trace_id, parent_id, kind, attributes or {})
+        span.is_root = True
+    span._token = _current_span.set(span)
+    return span
+
+
+def end_span(span, error: Optional[BaseException] = None) -> None:
+    if span is NOOP_SPAN:
+        return
+    span.end_ns = time.time_ns()
+    if error is not None:
+        span.record_exception(error)
+    if span._token is not None:
+        try:
+            _current_span.reset(span._token)
+        except ValueError:
+            # Ended from another context (e.g. a generator closed elsewhere); just leave the variable.
+            pass
+    trace = span._trace
+    with trace.lock:
+        if trace.decided:
+            # A straggler that finished after its root: follow the root's decision.
+            spans = [span] if trace.sampled else []
+        else:
+            trace.spans.append(span)
+            if not span.is_root:
+                return
+            slow = TRACING_SLOW_SECONDS and (span.end_ns - span.start_ns) / 1e9 >= TRACING_SLOW_SECONDS
+            trace.sampled = trace.sampled or bool(slow)
+            trace.decided = True
+            spans = trace.spans if trace.sampled else []
+            trace.spans = []
+    processor = get_span_processor()
+    if spans and processor is not None:
+        processor.submit(spans)
+
+
+class _SpanScope:
+    __slots__ = ("name", "kind", "attributes", "_span")
+
+    def __init__(self, name: str, kind: int, attributes: dict):
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self._span = NOOP_SPAN
+
+    def __enter__(self):
+        self._span = start_span(self.name, self.kind, self.attributes)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        end_span(self._span, exc if isinstance(exc, Exception) else None)
+        return False
+
+
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes) -> _SpanScope:
+    """`with span("name", key=value) as s:` opens a child of the current span, or a new trace."""
+    return _SpanScope(name, kind, attributes)
+
+
+def traced(name: str, kind: int = SPAN_KIND_INTERNAL):
+    """Decorator wrapping each call of a sync or async function in a span."""
+
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, kind):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, kind):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def traced_methods(prefix: str, kind: int = SPAN_KIND_CLIENT):
+    """Class decorator opening a "<prefix>.<method>" span around every public method."""
+
+    def decorator(cls):
+        for name, member in list(vars(cls).items()):
+            if callable(member) and not name.startswith("_") and not isinstance(member, (staticmethod, classmethod)):
+                setattr(cls, name, traced(f"{prefix}.{name}", kind)(member))
+        return cls
+
+    return decorator
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the server span of each HTTP request, continuing an incoming traceparent.
+
+    The response carries X-Trace-Id so a slow request can be found in the exported traces.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1") or None
+        request_span = start_span(
+            f"{scope['method']} {scope['path']}", SPAN_KIND_SERVER,
+            {"http.request.method": scope["method"], "url.path": scope["path"]},
+            traceparent=traceparent,
+        )
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                request_span.set_attribute("http.response.status_code", message["status"])
+                if message["status"] >= 500:
+                    request_span.status = STATUS_ERROR
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-trace-id", request_span.trace_id.encode())]
+            await send(message)
+
+        error = None
+        try:
+            await self.app(scope, receive, send_with_trace)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            route = scope.get("route")
+            if getattr(route, "path", None):
+                request_span.name = f"{scope['method']} {route.path}"
+                request_span.set_attribute("http.route", route.path)
+            end_span(request_span, error)
@@ -1,7 +1,66 @@
-from sqlalchemy import desc
+import os
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+from sqlalchemy import desc, insert, update
 from sqlalchemy.orm import Session
+from app.core.metrics import timed_methods
+from app.core.tracing import traced_methods
+from app.repository.pagination import Cursor, Page, keyset_page
+from dotenv import load_dotenv
 from data.models import Conversation, Message
 
+load_dotenv()
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+
+def _as_utc(value: Optional[datetime], default: datetime) -> datetime:
+    if value is None:
+        return default
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+@traced_methods("chat_turn")
+@timed_methods("chat_turn")
+class ChatTurn:
+    """The writes of one chat turn, applied in a single transaction by commit().
+
+    Created after the turn's reads; `title` and `summary` are the conversation's values as
+    read then, so callers do not need another query for them.
+    """
+
+    def __init__(self, db: Session, user_id: int, conversation_id: Optional[int], conversation: Conversation = None):
+        self.db = db
+        self.user_id = user_id
+        self.conversation_id = conversation_id
+        self.title = conversation.title if conversation is not None else None
+        self.summary = conversation.summary if conversation is not None else None
+        self._summary: Optional[tuple[str, int]] = None
+
+    def set_summary(self, summary: str, summary_message_id: int) -> None:
+        self._summary = (summary, summary_message_id)
+
+    def commit(self, query: str, response: str) -> int:
+        message = Message(
+            user_id=self.user_id,
+            query=query,
+            response=response,
+            conversation_id=self.conversation_id
+        )
+        self.db.add(message)
+        if self._summary is not None and self.conversation_id:
+            summary, summary_message_id = self._summary
+            self.db.execute(
+                update(Conversation)
+                .where(Conversation.id == self.conversation_id)
+                .values(summary=summary, summary_message_id=summary_message_id)
+            )
+        self.db.flush()
+        # Read the id before commit() expires the instance, which would cost a SELECT.
+        message_id = message.id
+        self.db.commit()
+        return message_id
+
+@traced_methods("chat")
+@timed_methods("chat")
 class ChatRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -22,6 +81,24 @@ class ChatRepository:
             query = query.filter(Message.conversation_id == conversation_id)
         return query.order_by(Message.created_at.asc()).all()
 
+    def get_history_page(
+        self, user_id: int, conversation_id: int = None, limit: int = 50,
+        before: Optional[Cursor] = None, after: Optional[Cursor] = None
+    ) -> Page:
+        query = self.db.query(Message).filter(Message.user_id == user_id)
+        if conversation_id:
+            query = query.filter(Message.conversation_id == conversation_id)
+        return keyset_page(query, Message.created_at, Message.id, limit, before=before, after=after)
+
+    def get_messages_after(self, user_id: int, conversation_id: int, after_id: Optional[int] = None):
+        query = self.db.query(Message).filter(
+            Message.user_id == user_id,
+            Message.conversation_id == conversation_id
+        )
+        if after_id is not None:
+            query = query.filter(Message.id > after_id)
+        return query.order_by(Message.created_at.asc(), Message.id.asc()).all()
+
     def create_message(self, user_id: int, query: str, response: str, conversation_id: int = None):
         new_msg = Message(
             user_id=user_id,
@@ -38,24 +115,104 @@ class ChatRepository:
         if conversation:
             conversation.title = new_title
             self.db.commit()
-            self.db.refresh(conversation)
+
+    def replace_default_title(self, user_id: int, conversation_id: int, new_title: str, defaults) -> bool:
+        updated = self.db.query(Conversation)\
+            .filter(
+                Conversation.id == conversation_id,
+                Conversation.user_id == user_id,
+                Conversation.title.in_(defaults)
+            )\
+            .update({"title": new_title}, synchronize_session=False)
+        self.db.commit()
+        return updated > 0
 
     def get_conversation(self, conversation_id: int):
         return self.db.query(Conversation).filter(Conversation.id == conversation_id).first()
 
+    def start_turn(self, user_id: int, conversation_id: Optional[int], conversation: Conversation = None) -> ChatTurn:
+        turn = ChatTurn(self.db, user_id, conversation_id, conversation)
+        # End the read transaction so the connection goes back to the pool while the model answers;
+        # detaching first keeps what was loaded readable instead of expired.
+        self.db.expunge_all()
+        self.db.rollback()
+        return turn
+
+    def import_conversations(
+        self, user_id: int, conversations: Iterable[dict], batch_size: int = IMPORT_BATCH_SIZE
+    ) -> tuple[int, int]:
+        """Inserts conversations with their messages in executemany batches, one commit per batch.
+
+        Each conversation is {"title", "messages": [{"query", "response", "created_at"?}]};
+        naive timestamps are taken as UTC and missing ones become the import time.
+        """
+        imported_conversations = imported_messages = 0
+        batch: list[dict] = []
+        pending_messages = 0
+
+        def flush_batch() -> int:
+            ids = self.db.scalars(
+                insert(Conversation).returning(Conversation.id, sort_by_parameter_order=True),
+                [{"user_id": user_id, "title": conv["title"], "created_at": conv["created_at"]} for conv in batch],
+            ).all()
+            rows = [
+                {**message, "user_id": user_id, "conversation_id": conv_id}
+                for conv_id, conv in zip(ids, batch)
+                for message in conv["messages"]
+            ]
+            for start in range(0, len(rows), batch_size):
+                self.db.execute(insert(Message), rows[start:start + batch_size])
+            self.db.commit()
+            return len(rows)
+
+        now = datetime.now(timezone.utc)
+        for conversation in conversations:
+            messages = [
+                {
+                    "query": message["query"],
+                    "response": message["response"],
+                    "created_at": _as_utc(message.get("created_at"), now),
+                }
+                for message in conversation.get("messages", [])
+            ]
+            batch.append({
+                "title": conversation.get("title") or "Imported chat",
+                "created_at": min((message["created_at"] for message in messages), default=now),
+                "messages": messages,
+            })
+            pending_messages += len(messages)
+            if pending_messages >= batch_size or len(batch) >= batch_size:
+                imported_messages += flush_batch()
+                imported_conversations += len(batch)
+                batch, pending_messages = [], 0
+        if batch:
+            imported_messages += flush_batch()
+            imported_conversations += len(batch)
+        return imported_conversations, imported_messages
+
     def delete_conversation(self, conversation_id: int, user_id: int) -> bool:
-        conversation = self.db.query(Conversation).filter(
+        # Messages go with it through ON DELETE CASCADE instead of being loaded by the ORM.
+        deleted = self.db.query(Conversation).filter(
             Conversation.id == conversation_id,
             Conversation.user_id == user_id
-        ).first()
-        if conversation:
-            self.db.delete(conversation)
-            self.db.commit()
-            return True
-        return False
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted > 0
+
+    def _conversation_list_query(self, user_id: int):
+        return self.db.query(Conversation.id, Conversation.title, Conversation.created_at)\
+            .filter(Conversation.user_id == user_id)
 
     def get_user_conversations(self, user_id: int):
-        return self.db.query(Conversation)\
-            .filter(Conversation.user_id == user_id)\
-            .order_by(desc(Conversation.created_at))\
-            .all()
\ No newline at end of file
+        return self._conversation_list_query(user_id)\
+            .order_by(desc(Conversation.created_at), desc(Conversation.id))\
+            .all()
+
+    def get_conversations_page(
+        self, user_id: int, limit: int = 50,
+        before: Optional[Cursor] = None, after: Optional[Cursor] = None
+    ) -> Page:
+        return keyset_page(
+            self._conversation_list_query(user_id), Conversation.created_at, Conversation.id,
+            limit, before=before, after=after, newest_first=True
+        )
\ No newline at end of file
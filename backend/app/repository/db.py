@@ -1,8 +1,13 @@
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from typing import Optional
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 import os
 from dotenv import load_dotenv
 
+from app.core.ttl_cache import TTLCache
+from app.repository.pool_metrics import PoolStats, instrumented_pool_class
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -10,8 +15,108 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL not set in .env")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
+# Optional replica for reads; leave unset to send everything to DATABASE_URL.
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle before server-side or firewall idle timeouts drop the connection under us.
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_FAST_EXECUTEMANY = os.getenv("DB_FAST_EXECUTEMANY", "true").lower() in ("1", "true", "yes")
+# How long after a user's write their reads stay on the primary; should exceed replica lag.
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+
+
+def engine_options(url: str, stats: PoolStats) -> dict:
+    url = make_url(url)
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite lives in a single connection; there is no pool to size.
+        return options
+    options.update(
+        poolclass=instrumented_pool_class(stats),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if url.get_backend_name() == "mssql" and url.get_driver_name() == "pyodbc":
+        # Sends executemany batches (bulk imports) as one parameter array instead of a round trip per row.
+        options["fast_executemany"] = DB_FAST_EXECUTEMANY
+    return options
+
+
+def _create_engine(url: str, stats: PoolStats) -> Engine:
+    new_engine = create_engine(url, **engine_options(url, stats))
+    stats.attach(new_engine)
+    if new_engine.dialect.name == "sqlite":
+        # SQLite only enforces foreign keys (and ON DELETE CASCADE) when asked to, per connection.
+        @event.listens_for(new_engine, "connect")
+        def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+            dbapi_connection.execute("PRAGMA foreign_keys=ON")
+    return new_engine
+
+
+pool_stats = PoolStats()
+engine = _create_engine(DATABASE_URL, pool_stats)
+
+read_pool_stats: Optional[PoolStats] = PoolStats() if DATABASE_READ_URL else None
+read_engine: Optional[Engine] = _create_engine(DATABASE_READ_URL, read_pool_stats) if DATABASE_READ_URL else None
+
+# User ids that wrote within the last REPLICA_STICKY_SECONDS, in this process.
+_recent_writers = TTLCache(maxsize=100_000, ttl=REPLICA_STICKY_SECONDS)
+
+
+class RoutingSession(Session):
+    """Sends plain SELECTs to the read replica and everything else to the primary.
+
+    Once a session has written, it stays on the primary so it reads its own rows (refresh
+    after commit included). A user who wrote recently is kept on the primary for
+    REPLICA_STICKY_SECONDS across requests, so a chat turn shows up in the very next
+    history read even while the replica lags; call `bind_user` to say whose session it is.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if read_engine is None:
+            return super().get_bind(mapper, clause=clause, **kw)
+        if self.info.get("wrote"):
+            return engine
+        if self._flushing or clause is None or not getattr(clause, "is_select", False):
+            self.info["wrote"] = True
+            return engine
+        user_id = self.info.get("user_id")
+        if user_id is not None and _recent_writers.get(user_id):
+            return engine
+        return read_engine
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_writer(session, *args):
+    if session.info.get("wrote") and session.info.get("user_id") is not None:
+        _recent_writers.set(session.info["user_id"], True)
+
+
+def bind_user(db: Session, user_id: int) -> None:
+    """Tags the session with the user it works for, for read-your-writes routing."""
+    db.info["user_id"] = user_id
+
+
+def mark_user_written(user_id: int) -> None:
+    """Keeps the user's reads on the primary for a while; for writes made outside their own session."""
+    if read_engine is not None:
+        _recent_writers.set(user_id, True)
+
+
+SessionLocal = sessionmaker(bind=engine, class_=RoutingSession)
+
+def get_pool_stats() -> dict:
+    stats = pool_stats.stats(engine.pool)
+    if read_engine is not None:
+        stats["replica"] = read_pool_stats.stats(read_engine.pool)
+        stats["replica_sticky_users"] = len(_recent_writers)
+    return stats
 
 def get_db():
     db = SessionLocal()
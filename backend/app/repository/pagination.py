@@ -0,0 +1,63 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, or_
+
+Cursor = tuple[datetime, int]
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+@dataclass
+class Page:
+    items: list
+    has_more: bool
+
+
+def keyset_page(query, created_column, id_column, limit: int, before: Optional[Cursor] = None,
+                after: Optional[Cursor] = None, newest_first: bool = False) -> Page:
+    """Pages `query` on (created_at, id) without OFFSET.
+
+    `before` selects rows older than the cursor and `after` rows newer than it; with neither, the
+    newest rows are returned. Items always come back in the requested display order.
+    """
+    if before is not None:
+        created_at, row_id = before
+        query = query.filter(or_(
+            created_column < created_at,
+            and_(created_column == created_at, id_column < row_id),
+        ))
+    if after is not None:
+        created_at, row_id = after
+        query = query.filter(or_(
+            created_column > created_at,
+            and_(created_column == created_at, id_column > row_id),
+        ))
+
+    walk_forward = after is not None
+    if walk_forward:
+        query = query.order_by(created_column.asc(), id_column.asc())
+    else:
+        query = query.order_by(created_column.desc(), id_column.desc())
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if walk_forward == newest_first:
+        rows.reverse()
+    return Page(items=rows, has_more=has_more)
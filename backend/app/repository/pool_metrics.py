@@ -0,0 +1,145 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# A checkout that takes longer than this had to wait for a connection to be returned
+# (or for a new one to be opened), rather than taking an idle one off the queue.
+WAIT_THRESHOLD_SECONDS = 0.001
+
+
+class PoolStats:
+    """Counters for one engine's connection pool, fed by pool events and InstrumentedQueuePool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.peak_overflow = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.invalidated = 0
+        self.lifetime_seconds_total = 0.0
+        self.lifetime_seconds_max = 0.0
+        self.held_seconds_total = 0.0
+        self.held_seconds_max = 0.0
+
+    def record_wait(self, seconds: float, overflow: int) -> None:
+        with self._lock:
+            self.peak_overflow = max(self.peak_overflow, overflow)
+            if seconds >= WAIT_THRESHOLD_SECONDS:
+                self.waits += 1
+                self.wait_seconds_total += seconds
+                self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        connection_record.info["opened_at"] = time.monotonic()
+        with self._lock:
+            self.connections_opened += 1
+
+    def _on_close(self, dbapi_connection, connection_record) -> None:
+        opened_at = connection_record.info.pop("opened_at", None)
+        with self._lock:
+            self.connections_closed += 1
+            if opened_at is not None:
+                lifetime = time.monotonic() - opened_at
+                self.lifetime_seconds_total += lifetime
+                self.lifetime_seconds_max = max(self.lifetime_seconds_max, lifetime)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidated += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info["checked_out_at"] = time.monotonic()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is None:
+            return
+        held = time.monotonic() - checked_out_at
+        with self._lock:
+            self.checked_out -= 1
+            self.held_seconds_total += held
+            self.held_seconds_max = max(self.held_seconds_max, held)
+
+    def attach(self, engine: Engine) -> None:
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "close", self._on_close)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def stats(self, pool=None) -> dict:
+        with self._lock:
+            closed = self.connections_closed
+            checkins = self.checkouts - self.checked_out
+            result = {
+                "checkouts": self.checkouts,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "peak_overflow": self.peak_overflow,
+                "waits": self.waits,
+                "wait_seconds_total": round(self.wait_seconds_total, 4),
+                "wait_seconds_max": round(self.wait_seconds_max, 4),
+                "timeouts": self.timeouts,
+                "connections_opened": self.connections_opened,
+                "connections_closed": closed,
+                "invalidated": self.invalidated,
+                "connection_lifetime_seconds_avg": round(self.lifetime_seconds_total / closed, 3) if closed else 0.0,
+                "connection_lifetime_seconds_max": round(self.lifetime_seconds_max, 3),
+                "checkout_held_seconds_avg": round(self.held_seconds_total / checkins, 4) if checkins > 0 else 0.0,
+                "checkout_held_seconds_max": round(self.held_seconds_max, 4),
+            }
+        if isinstance(pool, QueuePool):
+            result.update({
+                "pool_size": pool.size(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "idle": pool.checkedin(),
+            })
+        return result
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited, and when one timed out, to `stats`."""
+
+    stats = PoolStats()
+    _depth = threading.local()
+
+    def _do_get(self):
+        # QueuePool._do_get retries by calling itself; only time the outermost call.
+        depth = getattr(self._depth, "value", 0)
+        self._depth.value = depth + 1
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if not depth:
+                self.stats.record_timeout()
+            raise
+        finally:
+            self._depth.value = depth
+        if not depth:
+            self.stats.record_wait(time.perf_counter() - start, max(self.overflow(), 0))
+        return connection
+
+
+def instrumented_pool_class(stats: PoolStats) -> type:
+    """A pool class reporting to `stats`; being a class, it survives the pool being recreated."""
+    return type("InstrumentedQueuePool", (InstrumentedQueuePool,), {"stats": stats})
@@ -1,11 +1,36 @@
+import os
 from sqlalchemy.orm import Session
 from typing import Optional, List
 
-from app.core.security import encrypt_data, hash_password, verify_password, SECRET_KEY
+from app.core.gemini_clients import get_gemini_client_pool
+from app.core.security import decrypt_data_cached, encrypt_data, hash_password, invalidate_decrypted, verify_password, SECRET_KEY
+from app.core.metrics import timed_methods
+from app.core.tracing import traced_methods
+from app.core.ttl_cache import TTLCache
+from app.repository.db import mark_user_written
 from data.models import User
 from app.api.dtos.users.user_update import UserUpdate
 
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "4096"))
 
+# Detached User rows keyed by id, shared by all requests in this process. Every write below
+# invalidates its entry; other worker processes see the change once their entry expires.
+_user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+def user_cache_stats() -> dict:
+    return _user_cache.stats()
+
+def _forget_api_key(encrypted_api_key: Optional[str]) -> None:
+    """Drops the cached plaintext and the pooled Gemini client of a key that is being replaced."""
+    api_key = decrypt_data_cached(encrypted_api_key, SECRET_KEY)
+    if api_key:
+        get_gemini_client_pool().discard(api_key)
+    invalidate_decrypted(encrypted_api_key, SECRET_KEY)
+
+
+@traced_methods("user")
+@timed_methods("user")
 class UserRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -13,6 +38,15 @@ class UserRepository:
     def get_by_id(self, user_id: int) -> Optional[User]:
         return self.db.query(User).filter(User.id == user_id).first()
 
+    def get_cached_by_id(self, user_id: int) -> Optional[User]:
+        user = _user_cache.get(user_id)
+        if user is None:
+            user = self.get_by_id(user_id)
+            if user is not None:
+                self.db.expunge(user)
+                _user_cache.set(user_id, user)
+        return user
+
     def get_by_username(self, username: str) -> Optional[User]:
         return (
             self.db.query(User)
@@ -45,23 +79,38 @@ class UserRepository:
         self.db.add(user)
         self.db.commit()
         self.db.refresh(user)
+        # The client logs straight in with the new id; the replica may not have the row yet.
+        mark_user_written(user.id)
         return user
 
     def update_password(self, user: User, new_password_hash: str) -> User:
         user.password_hash = new_password_hash
         self.db.commit()
         self.db.refresh(user)
+        _user_cache.pop(user.id)
         return user
 
     def update_api_key(self, user: User, encrypted_api_key: Optional[str]) -> User:
+        _forget_api_key(user.encrypted_api_key)
         user.encrypted_api_key = encrypted_api_key
         self.db.commit()
         self.db.refresh(user)
+        _user_cache.pop(user.id)
+        return user
+
+    def update_recovery_tokens(self, user: User, encrypted_tokens: Optional[str]) -> User:
+        user_id = user.id
+        user.recovery_tokens = encrypted_tokens
+        self.db.commit()
+        _user_cache.pop(user_id)
         return user
 
     def delete(self, user: User) -> None:
+        user_id = user.id
+        _forget_api_key(user.encrypted_api_key)
         self.db.delete(user)
         self.db.commit()
+        _user_cache.pop(user_id)
         
     def update_user(self, user_id: int, updates: UserUpdate) -> Optional[User]:
         user = self.get_by_id(user_id)
@@ -78,10 +127,12 @@ class UserRepository:
             user.password_hash = hash_password(updates.new_password)
 
         if updates.api_key:
+            _forget_api_key(user.encrypted_api_key)
             user.encrypted_api_key = encrypt_data(updates.api_key, SECRET_KEY)
 
         self.db.commit()
         self.db.refresh(user)
+        _user_cache.pop(user_id)
         return user
 
     def verify_user_credentials(self, username: str, password: str) -> Optional[User]:
@@ -0,0 +1,104 @@
+"""Replays a skewed mix of repeated first-turn questions through POST /chat/ with the answer cache on.
+
+Questions follow a Zipf-like popularity curve and vary in case and punctuation, the way
+repeats arrive in practice. Reports the hit ratio, latency saved and per-request latency
+for hits and misses, and checks that every request still stored a message.
+
+Run from the backend directory:
+    python -m benchmarks.answer_cache --requests 500
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+from benchmarks.fakes import configure_environment, fake_genai_client
+
+configure_environment()
+os.environ["ANSWER_CACHE_ENABLED"] = "true"
+os.environ.setdefault("PAGE_CACHE_BACKEND", "none")
+os.environ.setdefault("SCRAPE_MAX_PER_HOST", "1000")
+
+import httpx
+
+from app.api.deps import get_current_user, get_current_user_api_key
+from app.core import gemini_clients
+from app.core.answer_cache import get_answer_cache
+from app.core.search import StaticSearchProvider, set_search_provider
+from app.repository.db import SessionLocal, engine
+from benchmarks.stub_server import StubServer
+from data.models import Base, Message, User
+from main import app
+
+QUESTIONS = [
+    "How do I reverse a list?", "How do I read a file line by line?", "What is a list comprehension?",
+    "How do I sort a dict by value?", "How do I check if a key exists in a dict?", "What does __init__ do?",
+    "How do I merge two dictionaries?", "What is the difference between a list and a tuple?",
+    "How do I remove duplicates from a list?", "How do I convert a string to an int?",
+    "What is a decorator?", "How do I handle exceptions?", "What does yield do?",
+    "How do I format a float to two decimals?", "How do I iterate with an index?",
+    "What is a lambda?", "How do I copy a list?", "How do I get the current date?",
+    "What are *args and **kwargs?", "How do I split a string?",
+]
+
+
+def variant(question: str, rng: random.Random) -> str:
+    text = question.lower() if rng.random() < 0.5 else question
+    return text.rstrip("?") if rng.random() < 0.3 else text
+
+
+async def run(requests: int, gemini_latency: float, page_latency: float, search_latency: float) -> None:
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        user = User(username="bench", email="bench@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_current_user_api_key] = lambda: "benchmark"
+    gemini_clients.genai.Client = fake_genai_client(gemini_latency)
+
+    rng = random.Random(0)
+    weights = [1 / rank for rank in range(1, len(QUESTIONS) + 1)]
+    workload = [variant(rng.choices(QUESTIONS, weights)[0], rng) for _ in range(requests)]
+
+    paths = {f"/page-{i}": page_latency for i in range(3)}
+    cache = get_answer_cache()
+    hit_latencies, miss_latencies = [], []
+    with StubServer(latencies=paths) as server:
+        set_search_provider(StaticSearchProvider(
+            [{"href": server.url(path), "title": path} for path in paths], latency=search_latency
+        ))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            for query in workload:
+                hits_before = cache.stats()["hits"]
+                start = time.perf_counter()
+                response = await client.post("/chat/", json={"query": query})
+                response.raise_for_status()
+                elapsed = time.perf_counter() - start
+                (hit_latencies if cache.stats()["hits"] > hits_before else miss_latencies).append(elapsed)
+
+    with SessionLocal() as db:
+        stored = db.query(Message).filter(Message.user_id == user.id).count()
+    stats = cache.stats()
+    print(f"requests:                 {requests} ({len(QUESTIONS)} distinct questions)")
+    print(f"hit ratio:                {stats['hit_ratio']:.1%} ({stats['hits']} hits, {stats['misses']} misses)")
+    print(f"latency saved:            {stats['latency_saved_seconds']:.1f}s")
+    print(f"miss latency p50:         {statistics.median(miss_latencies) * 1000:.1f}ms")
+    if hit_latencies:
+        print(f"hit latency p50:          {statistics.median(hit_latencies) * 1000:.1f}ms")
+    print(f"messages stored:          {stored} ({'ok' if stored == requests else 'MISMATCH'})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--gemini-latency", type=float, default=1.0)
+    parser.add_argument("--page-latency", type=float, default=0.3)
+    parser.add_argument("--search-latency", type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.gemini_latency, args.page_latency, args.search_latency))
@@ -0,0 +1,62 @@
+"""Measures requests/sec through get_current_user -> get_current_user_api_key with and without
+the decrypted-secret cache.
+
+Run from the backend directory:
+    python -m benchmarks.api_key_dependency --seconds 5
+"""
+import argparse
+import time
+
+from benchmarks.fakes import configure_environment
+
+configure_environment()
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.api.deps import get_current_user, get_current_user_api_key
+from app.core import security
+from app.repository.db import SessionLocal, engine
+from app.repository.user_repository import UserRepository
+from data.models import Base
+
+
+def measure(seconds: float, cached: bool) -> float:
+    db = SessionLocal()
+    token = security.create_access_token({"sub": "bench", "type": "access"})
+    auth = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    calls = 0
+    deadline = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < deadline:
+            if not cached:
+                security._decrypted_cache.clear()
+            user = get_current_user(auth=auth, db=db)
+            get_current_user_api_key(current_user=user)
+            calls += 1
+    finally:
+        db.close()
+    return calls / seconds
+
+
+def run(seconds: float) -> None:
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    UserRepository(db).create(
+        username="bench",
+        email="bench@example.com",
+        password_hash=security.hash_password("bench"),
+        encrypted_api_key=security.encrypt_data("AIza-benchmark-key", security.SECRET_KEY),
+    )
+    db.close()
+
+    before = measure(seconds, cached=False)
+    after = measure(seconds, cached=True)
+    print(f"uncached: {before:10.1f} req/s")
+    print(f"cached:   {after:10.1f} req/s  ({after / before:.0f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    run(args.seconds)
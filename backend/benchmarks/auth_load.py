@@ -0,0 +1,79 @@
+"""Load-tests GET /chat/conversations with and without the in-process user cache and counts
+how many queries hit the users table.
+
+Run from the backend directory:
+    python -m benchmarks.auth_load --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.fakes import configure_environment
+
+configure_environment()
+
+import httpx
+from sqlalchemy import event
+
+from app.core import security
+from app.repository import user_repository
+from app.repository.chat_repository import ChatRepository
+from app.repository.db import SessionLocal, engine
+from data.models import Base
+from main import app
+
+users_queries = 0
+
+
+def count_users_queries(conn, cursor, statement, parameters, context, executemany):
+    global users_queries
+    if "FROM users" in statement:
+        users_queries += 1
+
+
+async def measure(token: str, requests: int, concurrency: int) -> tuple[float, int]:
+    global users_queries
+    users_queries = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one_request():
+            async with semaphore:
+                response = await client.get("/chat/conversations", headers={"Authorization": f"Bearer {token}"})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one_request() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+    return requests / elapsed, users_queries
+
+
+async def run(requests: int, concurrency: int) -> None:
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    user = user_repository.UserRepository(db).create(
+        username="bench", email="bench@example.com", password_hash=security.hash_password("bench")
+    )
+    for i in range(20):
+        ChatRepository(db).create_conversation(user.id, f"Conversation {i}")
+    token = security.create_access_token({**security.user_token_claims(user), "type": "access"})
+    db.close()
+    event.listen(engine, "before_cursor_execute", count_users_queries)
+
+    ttl = user_repository._user_cache.ttl
+    user_repository._user_cache.ttl = 0
+    before, before_queries = await measure(token, requests, concurrency)
+    user_repository._user_cache.ttl = ttl
+    after, after_queries = await measure(token, requests, concurrency)
+
+    print(f"requests: {requests}, concurrency: {concurrency}")
+    print(f"without user cache: {before:8.1f} req/s, {before_queries} users-table queries")
+    print(f"with user cache:    {after:8.1f} req/s, {after_queries} users-table queries")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency))
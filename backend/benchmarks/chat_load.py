@@ -0,0 +1,84 @@
+"""Fires many concurrent POST /chat/ requests at the app with search, pages and Gemini stubbed out.
+
+Run from the backend directory:
+    python -m benchmarks.chat_load --concurrency 300
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks.fakes import configure_environment, fake_genai_client
+
+configure_environment()
+os.environ.setdefault("PAGE_CACHE_BACKEND", "none")
+# Every stub page lives on one local host but stands in for different sites.
+os.environ.setdefault("SCRAPE_MAX_PER_HOST", "1000")
+
+import httpx
+
+from app.api.deps import get_current_user, get_current_user_api_key
+from app.core import gemini_clients
+from app.core.search import StaticSearchProvider, set_search_provider
+from app.repository.db import SessionLocal, engine
+from benchmarks.stub_server import StubServer
+from data.models import Base, User
+from main import app
+
+
+async def run(concurrency: int, gemini_latency: float, page_latency: float, search_latency: float) -> None:
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        user = User(username="bench", email="bench@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        db.expunge(user)
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_current_user_api_key] = lambda: "benchmark"
+    gemini_clients.genai.Client = fake_genai_client(gemini_latency)
+
+    paths = {f"/page-{i}": page_latency for i in range(3)}
+    with StubServer(latencies=paths) as server:
+        set_search_provider(StaticSearchProvider(
+            [{"href": server.url(path), "title": path} for path in paths], latency=search_latency
+        ))
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            async def one_chat(i: int) -> float:
+                start = time.perf_counter()
+                response = await client.post("/chat/", json={"query": f"how to reverse a list {i}"})
+                response.raise_for_status()
+                return time.perf_counter() - start
+
+            async def probe_conversations() -> float:
+                await asyncio.sleep(search_latency / 2)
+                start = time.perf_counter()
+                response = await client.get("/chat/conversations")
+                response.raise_for_status()
+                return time.perf_counter() - start
+
+            start = time.perf_counter()
+            probe = asyncio.create_task(probe_conversations())
+            latencies = await asyncio.gather(*(one_chat(i) for i in range(concurrency)))
+            elapsed = time.perf_counter() - start
+            probe_latency = await probe
+
+    backend_latency = search_latency + page_latency + gemini_latency
+    print(f"in-flight chats:          {concurrency}")
+    print(f"stubbed backend latency:  {backend_latency:.2f}s per chat")
+    print(f"wall time:                {elapsed:.2f}s")
+    print(f"chat latency p50 / max:   {statistics.median(latencies):.2f}s / {max(latencies):.2f}s")
+    print(f"/chat/conversations:      {probe_latency * 1000:.1f}ms while chats were in flight")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=300)
+    parser.add_argument("--gemini-latency", type=float, default=1.0)
+    parser.add_argument("--page-latency", type=float, default=0.5)
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency, args.gemini_latency, args.page_latency, args.search_latency))
@@ -0,0 +1,72 @@
+"""Compares the old 20k-character-per-source truncation with BM25 chunk selection.
+
+Each query is paired with three docs pages the way a web search would return them, and
+`expected` is a phrase the answer needs; "hit" means the phrase made it into the prompt.
+
+Run from the backend directory:
+    python -m benchmarks.context_selection [--fixtures DIR] [--budget 12000]
+"""
+import argparse
+import time
+
+from app.core.chat_agent import ChatAgent
+from app.core.context_ranking import CONTEXT_CHAR_BUDGET, CONTEXT_CHUNK_CHARS, select_context
+from benchmarks.pydocs import load_corpus
+
+QUERIES = [
+    ("How do I remove an item from a list by index?", ["typesseq-mutable.html", "typesseq.html", "sequence-types.html"], "s.pop"),
+    ("How does async with work for asynchronous context managers?", ["compound.html", "async.html", "with.html"], "__aenter__"),
+    ("How do I catch several exceptions at once with except*?", ["compound.html", "try.html", "exceptions.html"], "ExceptionGroup"),
+    ("What format spec pads a number with zeros?", ["formatstrings.html", "string-methods.html", "strings.html"], "zero-padding"),
+    ("How do I split a string on whitespace?", ["string-methods.html", "typesseq.html", "strings.html"], "str.split"),
+    ("What does dict.get return when the key is missing?", ["typesmapping.html", "specialnames.html", "types.html"], "default"),
+    ("How do I re-raise an exception with a different type?", ["raise.html", "try.html", "compound.html"], "__cause__"),
+    ("How do relative imports with leading dots work?", ["import.html", "naming.html", "execmodel.html"], "from . import mod"),
+]
+
+
+def legacy_context(pages: list[tuple[dict, str]]) -> list[str]:
+    return [
+        f"SOURCE: {result.get('title')} ({result.get('href')})\nCONTENT:\n{content[:20000]}\n"
+        for result, content in pages
+    ]
+
+
+def run(fixtures: str, budget: int, chunk_chars: int) -> None:
+    corpus = load_corpus(fixtures)
+    rows = []
+    for query, names, expected in QUERIES:
+        names = [name for name in names if name in corpus]
+        start = time.perf_counter()
+        pages = [({"title": name, "href": f"https://docs.python.org/3/{name}"}, ChatAgent.extract_text(corpus[name])) for name in names]
+        extract_ms = (time.perf_counter() - start) * 1000
+
+        legacy = "\n".join(legacy_context(pages))
+        start = time.perf_counter()
+        ranked = "\n".join(select_context(query, pages, budget, chunk_chars))
+        select_ms = (time.perf_counter() - start) * 1000
+        rows.append((query, len(legacy), expected in legacy, len(ranked), expected in ranked, extract_ms, select_ms))
+
+    print(f"budget {budget} chars, chunks of {chunk_chars} chars, {len(corpus)} pages in corpus\n")
+    print(f"{'query':<60} {'legacy':>8} {'hit':>4} {'ranked':>8} {'hit':>4} {'extract':>9} {'select':>8}")
+    for query, legacy_len, legacy_hit, ranked_len, ranked_hit, extract_ms, select_ms in rows:
+        print(
+            f"{query[:60]:<60} {legacy_len:>8} {'yes' if legacy_hit else 'no':>4} {ranked_len:>8} "
+            f"{'yes' if ranked_hit else 'no':>4} {extract_ms:>7.1f}ms {select_ms:>6.1f}ms"
+        )
+    legacy_total = sum(row[1] for row in rows)
+    ranked_total = sum(row[3] for row in rows)
+    print(
+        f"\nmean prompt context: legacy {legacy_total / len(rows):.0f} chars, ranked {ranked_total / len(rows):.0f} chars "
+        f"({ranked_total / legacy_total:.0%}); hits legacy {sum(row[2] for row in rows)}/{len(rows)}, "
+        f"ranked {sum(row[4] for row in rows)}/{len(rows)}; mean selection time {sum(row[6] for row in rows) / len(rows):.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", help="directory of saved .html pages (default: rendered Python docs topics)")
+    parser.add_argument("--budget", type=int, default=CONTEXT_CHAR_BUDGET)
+    parser.add_argument("--chunk-chars", type=int, default=CONTEXT_CHUNK_CHARS)
+    args = parser.parse_args()
+    run(args.fixtures, args.budget, args.chunk_chars)
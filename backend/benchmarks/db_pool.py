@@ -0,0 +1,75 @@
+"""Runs more worker threads than the pool holds connections, each checking out a session for
+a short query plus some held time, and reports checkout waits, overflow use and timeouts.
+
+Run from the backend directory:
+    python -m benchmarks.db_pool --workers 60 --hold 0.02 --pool 5:10 10:20 30:30
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.fakes import configure_environment
+
+configure_environment()
+
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.orm import sessionmaker
+
+from app.repository.pool_metrics import PoolStats, instrumented_pool_class
+
+
+def run(url: str, pool_size: int, max_overflow: int, workers: int, requests: int, hold: float, timeout: float) -> None:
+    pool_stats = PoolStats()
+    engine = create_engine(
+        url, poolclass=instrumented_pool_class(pool_stats), pool_size=pool_size, max_overflow=max_overflow,
+        pool_timeout=timeout, pool_pre_ping=True,
+    )
+    pool_stats.attach(engine)
+    Session = sessionmaker(bind=engine)
+    failures = 0
+    lock = threading.Lock()
+
+    def worker() -> None:
+        nonlocal failures
+        for _ in range(requests):
+            try:
+                with Session() as db:
+                    db.execute(text("SELECT 1"))
+                    # Stands in for the time a request keeps its session open around the query.
+                    time.sleep(hold)
+            except exc.TimeoutError:
+                with lock:
+                    failures += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stats = pool_stats.stats(engine.pool)
+    engine.dispose()
+    done = workers * requests - failures
+    print(
+        f"pool {pool_size:3d}+{max_overflow:<3d} {done / elapsed:8.0f} req/s "
+        f"waits {stats['waits']:6d} avg wait {stats['wait_seconds_total'] / max(stats['waits'], 1) * 1000:7.1f} ms "
+        f"max wait {stats['wait_seconds_max'] * 1000:7.1f} ms peak overflow {stats['peak_overflow']:3d} "
+        f"timeouts {stats['timeouts']:4d} opened {stats['connections_opened']:3d}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=60)
+    parser.add_argument("--requests", type=int, default=20, help="per worker")
+    parser.add_argument("--hold", type=float, default=0.02, help="seconds each session stays checked out")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--pool", nargs="+", default=["5:10", "10:20", "30:30"], help="pool_size:max_overflow")
+    args = parser.parse_args()
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='chatbot-pool-'), 'pool.db')}"
+    for spec in args.pool:
+        size, overflow = (int(part) for part in spec.split(":"))
+        run(url, size, overflow, args.workers, args.requests, args.hold, args.timeout)
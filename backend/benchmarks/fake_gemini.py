@@ -0,0 +1,141 @@
+"""Local stand-in for the Gemini REST API, for load tests that run the real app and SDK.
+
+Point the app at it with GEMINI_BASE_URL. It answers generateContent and
+streamGenerateContent (SSE) for any model, sleeping `first_token_latency` before the first
+token and `token_latency` per token after it, so streamed and whole answers cost the same.
+
+Run on its own from the backend directory:
+    python -m benchmarks.fake_gemini --port 8090 --token-latency 0.02
+"""
+import argparse
+import json
+import multiprocessing
+import time
+from http.server import BaseHTTPRequestHandler
+
+from benchmarks.stub_server import _Server
+
+ANSWER_WORDS = (
+    "To reverse a list in place call items.reverse(); to get a reversed copy use items[::-1] "
+    "or list(reversed(items)). Sorting works the same way: items.sort() sorts in place and "
+    "sorted(items) returns a new list. Both accept key= and reverse=True."
+).split()
+TITLE = "Reversing Python Lists"
+
+
+def _answer(tokens: int) -> list[str]:
+    return [ANSWER_WORDS[i % len(ANSWER_WORDS)] + " " for i in range(tokens)]
+
+
+def _prompt_text(body: dict) -> str:
+    contents = body.get("contents") or []
+    parts = contents[-1].get("parts", []) if contents else []
+    return "".join(part.get("text", "") for part in parts)
+
+
+def _response(text: str, prompt_chars: int, finished: bool = True) -> dict:
+    candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+    if finished:
+        candidate["finishReason"] = "STOP"
+    return {
+        "candidates": [candidate],
+        "usageMetadata": {"promptTokenCount": prompt_chars // 4, "candidatesTokenCount": len(text) // 4},
+        "modelVersion": "fake-gemini",
+    }
+
+
+def _serve(host: str, port: int, first_token_latency: float, token_latency: float, tokens: int, chunk_tokens: int, ready) -> None:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            prompt = _prompt_text(body)
+            # Titles and summaries come through generateContent too; titles are a few words.
+            words = [TITLE] if "title" in prompt[:300].lower() else _answer(tokens)
+            if ":streamGenerateContent" in self.path:
+                self._stream(words, len(prompt))
+            elif ":generateContent" in self.path:
+                time.sleep(first_token_latency + token_latency * (len(words) - 1))
+                self._send_json(200, _response("".join(words), len(prompt)))
+            else:
+                self._send_json(404, {"error": {"code": 404, "message": f"Unknown path {self.path}", "status": "NOT_FOUND"}})
+
+        def _send_json(self, status: int, payload: dict) -> None:
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, words: list[str], prompt_chars: int) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            time.sleep(first_token_latency)
+            try:
+                for start in range(0, len(words), chunk_tokens):
+                    chunk = words[start:start + chunk_tokens]
+                    if start:
+                        time.sleep(token_latency * len(chunk))
+                    finished = start + chunk_tokens >= len(words)
+                    event = f"data: {json.dumps(_response(''.join(chunk), prompt_chars, finished))}\r\n\r\n".encode()
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+            except ConnectionError:
+                pass  # the app gave up on the stream
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = _Server((host, port), Handler)
+    if ready is not None:
+        ready.put(httpd.server_address[1])
+    httpd.serve_forever()
+
+
+class FakeGeminiServer:
+    """Runs the fake API in a child process, like StubServer, so it does not share the GIL with the app."""
+
+    def __init__(
+        self, first_token_latency: float = 0.3, token_latency: float = 0.02, tokens: int = 60,
+        chunk_tokens: int = 5, host: str = "127.0.0.1",
+    ):
+        self.host = host
+        self.port = None
+        self._ready = multiprocessing.Queue()
+        self.process = multiprocessing.Process(
+            target=_serve,
+            args=(host, 0, first_token_latency, token_latency, tokens, chunk_tokens, self._ready),
+            daemon=True,
+        )
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self):
+        self.process.start()
+        self.port = self._ready.get(timeout=10)
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--chunk-tokens", type=int, default=5)
+    args = parser.parse_args()
+    print(f"Fake Gemini API on http://{args.host}:{args.port} (set GEMINI_BASE_URL to this)")
+    _serve(args.host, args.port, args.first_token_latency, args.token_latency, args.tokens, args.chunk_tokens, None)
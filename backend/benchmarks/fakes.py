@@ -0,0 +1,71 @@
+import asyncio
+import os
+import tempfile
+
+
+def configure_environment() -> str:
+    """Points the app at a throwaway SQLite database; must run before importing `app` or `main`."""
+    path = os.path.join(tempfile.mkdtemp(prefix="chatbot-bench-"), "bench.db")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{path}")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    return os.environ["DATABASE_URL"]
+
+
+class _FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+FAKE_ANSWER = "Use reversed(items) or items[::-1]."
+
+
+class _FakeChat:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def send_message(self, message):
+        await asyncio.sleep(self.latency)
+        return _FakeResponse(FAKE_ANSWER)
+
+    async def send_message_stream(self, message):
+        words = FAKE_ANSWER.split(" ")
+
+        async def chunks():
+            for word in words:
+                await asyncio.sleep(self.latency / len(words))
+                yield _FakeResponse(word + " ")
+
+        return chunks()
+
+
+class _FakeChats:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def create(self, model, history=None):
+        return _FakeChat(self.latency)
+
+
+class _FakeModels:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def generate_content(self, model, contents):
+        await asyncio.sleep(self.latency)
+        return _FakeResponse("Reversing Lists")
+
+
+class _FakeAio:
+    def __init__(self, latency: float):
+        self.chats = _FakeChats(latency)
+        self.models = _FakeModels(latency)
+
+
+def fake_genai_client(latency: float):
+    """Returns a drop-in replacement for `genai.Client` whose calls just sleep for `latency` seconds."""
+
+    class FakeGenaiClient:
+        def __init__(self, api_key: str = None, **kwargs):
+            self.aio = _FakeAio(latency)
+
+    return FakeGenaiClient
@@ -0,0 +1,83 @@
+"""Seeds a SQLite database with many long messages and compares the full-list history and
+conversation queries with keyset-paginated pages.
+
+Run from the backend directory:
+    python -m benchmarks.history_pagination --messages 100000
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from benchmarks.fakes import configure_environment
+
+configure_environment()
+
+from sqlalchemy import insert
+
+from app.repository.chat_repository import ChatRepository
+from app.repository.db import SessionLocal, engine
+from data.models import Base, Conversation, Message, User
+
+BATCH_SIZE = 5000
+
+
+def seed(messages: int, conversations: int, body_size: int) -> None:
+    Base.metadata.create_all(engine)
+    start = datetime(2025, 1, 1)
+    body = ("Lists can be reversed with reversed(items) or items[::-1]. " * (body_size // 58 + 1))[:body_size]
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "username": "bench", "email": "bench@example.com", "password_hash": "x"}])
+        conn.execute(insert(Conversation), [
+            {"id": i + 1, "user_id": 1, "title": f"Conversation {i}", "created_at": start + timedelta(minutes=i)}
+            for i in range(conversations)
+        ])
+        for offset in range(0, messages, BATCH_SIZE):
+            conn.execute(insert(Message), [
+                {
+                    "user_id": 1,
+                    "conversation_id": i % conversations + 1,
+                    "query": f"Question {i}",
+                    "response": body,
+                    "created_at": start + timedelta(seconds=i),
+                }
+                for i in range(offset, min(offset + BATCH_SIZE, messages))
+            ])
+
+
+def measure(label: str, fn) -> None:
+    db = SessionLocal()
+    try:
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn(ChatRepository(db))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        db.close()
+    rows = len(result.items) if hasattr(result, "items") else len(result)
+    print(f"{label:<42} {elapsed * 1000:9.1f} ms {peak / 1024 / 1024:9.1f} MiB peak {rows:7d} rows")
+
+
+def run(messages: int, conversations: int, body_size: int, limit: int) -> None:
+    print(f"Seeding {messages} messages across {conversations} conversations...")
+    seed(messages, conversations, body_size)
+
+    measure("history, all messages", lambda repo: repo.get_user_history(1))
+    measure(f"history page, limit={limit}", lambda repo: repo.get_history_page(1, limit=limit))
+    measure("history, one conversation", lambda repo: repo.get_user_history(1, conversation_id=1))
+    measure(f"history page, one conversation, limit={limit}",
+            lambda repo: repo.get_history_page(1, conversation_id=1, limit=limit))
+    measure("conversations, all", lambda repo: repo.get_user_conversations(1))
+    measure(f"conversations page, limit={limit}", lambda repo: repo.get_conversations_page(1, limit=limit))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--conversations", type=int, default=500)
+    parser.add_argument("--body-size", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    run(args.messages, args.conversations, args.body_size, args.limit)
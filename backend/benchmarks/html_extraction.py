@@ -0,0 +1,85 @@
+"""Compares HTML-to-text extractors on a Python-docs corpus: throughput and parity with BeautifulSoup.
+
+The legacy row is the old BeautifulSoup get_text() pipeline, for speed only; parity is
+checked against the bs4 backend, which applies the same rules as the fast ones on a
+full soup. "chunked" feeds each page in 4 KiB pieces, the way streamed downloads will.
+
+Run from the backend directory:
+    python -m benchmarks.html_extraction [--fixtures DIR] [--repeat 3]
+"""
+import argparse
+import difflib
+import time
+
+from bs4 import BeautifulSoup
+
+from app.core.html_extract import BeautifulSoupExtractor, available_extractors, create_extractor
+from benchmarks.pydocs import load_corpus
+
+CHUNK_SIZE = 4096
+
+
+def legacy_extract(html: str) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    for script in soup(["script", "style"]):
+        script.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return "\n".join(chunk for chunk in chunks if chunk)
+
+
+def chunked_extract(extractor, html: str) -> str:
+    parser = extractor.parser()
+    for offset in range(0, len(html), CHUNK_SIZE):
+        parser.feed(html[offset:offset + CHUNK_SIZE])
+    return parser.close()
+
+
+def timed(extract, corpus: dict[str, str], repeat: int) -> tuple[float, dict[str, str]]:
+    best = float("inf")
+    outputs = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = {name: extract(html) for name, html in corpus.items()}
+        best = min(best, time.perf_counter() - start)
+    return best, outputs
+
+
+def parity(outputs: dict[str, str], reference: dict[str, str]) -> tuple[int, float]:
+    exact = sum(outputs[name] == reference[name] for name in reference)
+    ratio = sum(
+        difflib.SequenceMatcher(None, outputs[name].splitlines(), reference[name].splitlines(), autojunk=False).ratio()
+        for name in reference
+    ) / len(reference)
+    return exact, ratio
+
+
+def run(fixtures: str, repeat: int) -> None:
+    corpus = load_corpus(fixtures)
+    megabytes = sum(len(html.encode("utf-8")) for html in corpus.values()) / 1e6
+    _, reference = timed(BeautifulSoupExtractor().extract, corpus, 1)
+
+    rows = [("legacy bs4 get_text", *timed(legacy_extract, corpus, repeat))]
+    for name in available_extractors():
+        extractor = create_extractor(name)
+        rows.append((name, *timed(extractor.extract, corpus, repeat)))
+        rows.append((f"{name} chunked", *timed(lambda html: chunked_extract(extractor, html), corpus, repeat)))
+
+    print(f"{len(corpus)} pages, {megabytes:.2f} MB of HTML, best of {repeat}\n")
+    print(f"{'extractor':<22} {'MB/s':>8} {'ms/page':>9} {'exact':>9} {'line parity':>12} {'chars out':>10}")
+    for name, elapsed, outputs in rows:
+        exact, ratio = parity(outputs, reference)
+        chars = sum(len(text) for text in outputs.values())
+        print(
+            f"{name:<22} {megabytes / elapsed:>8.1f} {elapsed * 1000 / len(corpus):>9.2f} "
+            f"{exact:>4}/{len(corpus):<4} {ratio:>12.3f} {chars:>10}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", help="directory of saved .html pages (default: rendered Python docs topics)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.fixtures, args.repeat)
@@ -0,0 +1,329 @@
+"""Load test of the running app against local stand-ins for Gemini, web search and web pages.
+
+Starts the fake Gemini API (benchmarks.fake_gemini), a static server with Python-docs pages
+(benchmarks.pydocs), a search result file pointing at those pages, and the app itself under
+uvicorn wired to all three through its settings. It then registers users, imports some
+history, and drives each endpoint at every concurrency level with closed-loop clients,
+reporting p50/p95/p99 latency and throughput.
+
+Results are written as JSON; pass an earlier file to --compare to flag regressions.
+
+Run from the backend directory:
+    python -m benchmarks.load_test --concurrency 1 10 50 --out load.json
+    python -m benchmarks.load_test --concurrency 1 10 50 --compare load.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.fake_gemini import FakeGeminiServer
+from benchmarks.pydocs import load_corpus
+from benchmarks.stub_server import StubServer
+
+ENDPOINTS = ("login", "conversations", "history", "chat")
+PASSWORD = "load-test-password"
+TOPICS = ("typesseq-mutable.html", "typesseq.html", "lambda.html", "sequence-types.html", "slicings.html")
+QUERIES = (
+    "How do I reverse a list", "What does list.sort(key=...) do", "How to slice a list backwards",
+    "Difference between sorted and sort", "How to remove duplicates from a list",
+)
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)]
+
+
+def summarize(endpoint: str, concurrency: int, latencies: list[float], errors: int, seconds: float) -> dict:
+    latencies.sort()
+    ms = lambda value: round(value * 1000, 2)
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "throughput_rps": round(len(latencies) / seconds, 2) if seconds else 0.0,
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(latencies[-1]) if latencies else 0.0,
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        },
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class App:
+    """The app under uvicorn in a child process, configured only through environment variables."""
+
+    def __init__(self, env: dict, workers: int, log_path: str):
+        self.port = free_port()
+        self.log_path = log_path
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.env = {**os.environ, **env}
+        self.workers = workers
+        self.process = None
+        self._log = None
+
+    def __enter__(self):
+        self._log = open(self.log_path, "w", encoding="utf-8")
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(self.port),
+                "--workers", str(self.workers), "--log-level", "warning", "--no-access-log",
+            ],
+            env=self.env,
+            stdout=self._log,
+            stderr=subprocess.STDOUT,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with {self.process.returncode}, see {self.log_path}")
+            try:
+                httpx.get(f"{self.base_url}/openapi.json", timeout=1).raise_for_status()
+                return self
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        raise RuntimeError("uvicorn did not start within 30s")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait(timeout=15)
+        self._log.close()
+
+
+def create_schema(database_url: str) -> None:
+    from sqlalchemy import create_engine
+
+    from data.models import Base
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+
+async def seed(client: httpx.AsyncClient, users: int, history_messages: int) -> list[dict]:
+    """Registers users and imports a conversation with `history_messages` messages for each."""
+    seeded = []
+    for i in range(users):
+        username = f"load{i}"
+        response = await client.post("/users/register", json={
+            "email": f"{username}@example.com", "username": username, "password": PASSWORD, "gemini_api_key": "fake-key",
+        })
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        conversations = [{
+            "title": f"Imported {c}",
+            "messages": [
+                {"query": f"{QUERIES[m % len(QUERIES)]}?", "response": "Use reversed() or slicing. " * 20}
+                for m in range(history_messages if c == 0 else 2)
+            ],
+        } for c in range(10)]
+        (await client.post("/chat/import", json={"conversations": conversations}, headers=headers)).raise_for_status()
+        listed = (await client.get("/chat/conversations", headers=headers)).json()
+        conversation_id = next(c["id"] for c in listed if c["title"] == "Imported 0")
+        seeded.append({"email": f"{username}@example.com", "headers": headers, "conversation_id": conversation_id})
+    return seeded
+
+
+def request_factory(endpoint: str, users: list[dict], history_limit: int):
+    def login(i: int):
+        # The login form's "username" is the email address.
+        return "POST", "/users/login", {"json": {"username": users[i % len(users)]["email"], "password": PASSWORD}}
+
+    def conversations(i: int):
+        return "GET", "/chat/conversations", {"headers": users[i % len(users)]["headers"]}
+
+    def history(i: int):
+        user = users[i % len(users)]
+        params = {"conversation_id": user["conversation_id"]}
+        if history_limit:
+            params["limit"] = history_limit
+        return "GET", "/chat/history", {"headers": user["headers"], "params": params}
+
+    def chat(i: int):
+        # A new conversation per request, so every answer goes through search, scraping and Gemini.
+        query = f"{QUERIES[i % len(QUERIES)]} (request {i})"
+        return "POST", "/chat/", {"headers": users[i % len(users)]["headers"], "json": {"query": query}}
+
+    return {"login": login, "conversations": conversations, "history": history, "chat": chat}[endpoint]
+
+
+async def run_level(client: httpx.AsyncClient, endpoint: str, make_request, concurrency: int, requests: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < requests:
+            i = next_index
+            next_index += 1
+            method, path, kwargs = make_request(i)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(endpoint, concurrency, latencies, errors, time.perf_counter() - start)
+
+
+def print_result(result: dict) -> None:
+    latency = result["latency_ms"]
+    print(
+        f"{result['endpoint']:<14} c={result['concurrency']:<4} {result['throughput_rps']:9.1f} req/s  "
+        f"p50 {latency['p50']:8.1f}  p95 {latency['p95']:8.1f}  p99 {latency['p99']:8.1f} ms  "
+        f"errors {result['errors']}"
+    )
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> list[str]:
+    """Prints p95 and throughput against a previous run; returns the regressions beyond `tolerance`."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["endpoint"], r["concurrency"]): r for r in json.load(f)["results"]}
+    regressions = []
+    print(f"\ncompared with {baseline_path} (tolerance {tolerance:.0%})")
+    for result in results:
+        before = baseline.get((result["endpoint"], result["concurrency"]))
+        if before is None:
+            continue
+        p95_change = result["latency_ms"]["p95"] / before["latency_ms"]["p95"] - 1 if before["latency_ms"]["p95"] else 0.0
+        rps_change = result["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else 0.0
+        label = f"{result['endpoint']} c={result['concurrency']}"
+        regressed = p95_change > tolerance or rps_change < -tolerance or result["errors"] > before["errors"]
+        print(f"{'REGRESSED' if regressed else 'ok':<10}{label:<22} p95 {p95_change:+7.1%}  throughput {rps_change:+7.1%}")
+        if regressed:
+            regressions.append(label)
+    return regressions
+
+
+async def drive(args, base_url: str) -> list[dict]:
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 10, max_keepalive_connections=max(args.concurrency) + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        users = await seed(client, args.users, args.history_messages)
+        results = []
+        for endpoint in args.endpoints:
+            make_request = request_factory(endpoint, users, args.history_limit)
+            if args.warmup:
+                await run_level(client, endpoint, make_request, min(args.warmup, max(args.concurrency)), args.warmup)
+            for concurrency in args.concurrency:
+                requests = max(args.chat_requests if endpoint == "chat" else args.requests, concurrency)
+                result = await run_level(client, endpoint, make_request, concurrency, requests)
+                print_result(result)
+                results.append(result)
+        return results
+
+
+def main(args) -> None:
+    directory = tempfile.mkdtemp(prefix="chatbot-load-")
+    database_url = f"sqlite:///{os.path.join(directory, 'load.db')}"
+    create_schema(database_url)
+
+    corpus = load_corpus(args.pages)
+    pages = {f"/{name}": (html.encode(), "text/html; charset=utf-8") for name, html in corpus.items()}
+    latencies = {path: args.page_latency for path in pages}
+    topics = [name for name in TOPICS if name in corpus] or sorted(corpus)[:5]
+
+    with StubServer(latencies=latencies, pages=pages) as docs, FakeGeminiServer(
+        args.first_token_latency, args.token_latency, args.tokens
+    ) as gemini:
+        search_file = os.path.join(directory, "search.json")
+        with open(search_file, "w", encoding="utf-8") as f:
+            json.dump([{"href": docs.url(f"/{name}"), "title": name, "body": ""} for name in topics], f)
+        env = {
+            "DATABASE_URL": database_url,
+            "SECRET_KEY": os.environ.get("SECRET_KEY", "load-test-secret"),
+            "GEMINI_BASE_URL": gemini.base_url,
+            "SEARCH_PROVIDER": "static",
+            "SEARCH_STATIC_FILE": search_file,
+            "SEARCH_STATIC_LATENCY": str(args.search_latency),
+            # Every docs page lives on one local host but stands in for different sites.
+            "SCRAPE_MAX_PER_HOST": "1000",
+            "PAGE_CACHE_BACKEND": args.page_cache,
+            "SEMANTIC_CACHE_PATH": "",
+            "TRACING_EXPORTER": "none",
+        }
+        log_path = os.path.join(directory, "app.log")
+        print(f"app output goes to {log_path}\n")
+        with App(env, args.workers, log_path) as app:
+            results = asyncio.run(drive(args, app.base_url))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("out", "compare")},
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nresults written to {args.out}")
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=500, help="per endpoint and concurrency level")
+    parser.add_argument("--chat-requests", type=int, default=100, help="like --requests, for /chat/")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--history-messages", type=int, default=200)
+    parser.add_argument("--history-limit", type=int, default=50, help="page size for /chat/history; 0 reads it all")
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--search-latency", type=float, default=0.2)
+    parser.add_argument("--page-latency", type=float, default=0.1)
+    parser.add_argument("--page-cache", choices=("none", "memory"), default="none")
+    parser.add_argument("--pages", help="directory of saved HTML pages instead of the rendered pydoc topics")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95/throughput change before flagging")
+    main(parser.parse_args())
@@ -0,0 +1,133 @@
+"""Counts the statements and commits a chat turn costs, and compares importing history
+row by row with the batched executemany import.
+
+Run from the backend directory:
+    python -m benchmarks.message_writes --turns 500 --messages 20000
+"""
+import argparse
+import time
+
+from benchmarks.fakes import configure_environment
+
+configure_environment()
+
+from sqlalchemy import event
+
+from app.repository.chat_repository import ChatRepository
+from app.repository.db import SessionLocal, engine
+from data.models import Base, Message, User
+
+
+class Counter:
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._statement)
+        event.listen(engine, "commit", self._commit)
+
+    def _statement(self, *args):
+        self.statements += 1
+
+    def _commit(self, *args):
+        self.commits += 1
+
+    def reset(self) -> None:
+        self.statements = self.commits = 0
+
+
+def separate_commits(repo: ChatRepository, user_id: int, conversation_id: int, i: int) -> None:
+    """The write path before ChatTurn: a commit per write and a refresh after the title update."""
+    repo.create_message(user_id=user_id, query=f"Question {i}", response="Answer", conversation_id=conversation_id)
+    conversation = repo.get_conversation(conversation_id)
+    repo.update_conversation_title(conversation_id, f"Title {i}")
+    repo.db.refresh(conversation)
+
+
+def chat_turn(repo: ChatRepository, user_id: int, conversation_id: int, i: int) -> None:
+    conversation = repo.get_conversation(conversation_id)
+    turn = repo.start_turn(user_id, conversation_id, conversation)
+    turn.set_summary("Earlier: list questions", 1)
+    turn.commit(f"Question {i}", "Answer")
+
+
+def run_turns(label: str, fn, counter: Counter, user_id: int, turns: int) -> None:
+    with SessionLocal() as db:
+        repo = ChatRepository(db)
+        conversation_id = repo.create_conversation(user_id, "Bench")
+        counter.reset()
+        start = time.perf_counter()
+        for i in range(turns):
+            fn(repo, user_id, conversation_id, i)
+        elapsed = time.perf_counter() - start
+    print(
+        f"{label:<28} {elapsed / turns * 1000:7.2f} ms/turn "
+        f"{counter.statements / turns:5.1f} statements/turn {counter.commits / turns:4.1f} commits/turn"
+    )
+
+
+def history(conversations: int, messages: int) -> list[dict]:
+    per_conversation = messages // conversations
+    return [
+        {
+            "title": f"Imported {c}",
+            "messages": [{"query": f"Question {i}", "response": "Answer " * 40} for i in range(per_conversation)],
+        }
+        for c in range(conversations)
+    ]
+
+
+def import_row_by_row(repo: ChatRepository, user_id: int, data: list[dict]) -> int:
+    count = 0
+    for conversation in data:
+        conversation_id = repo.create_conversation(user_id, conversation["title"])
+        for message in conversation["messages"]:
+            repo.create_message(user_id, message["query"], message["response"], conversation_id)
+            count += 1
+    return count
+
+
+def run_import(label: str, fn, counter: Counter, user_id: int, data: list[dict]) -> None:
+    with SessionLocal() as db:
+        counter.reset()
+        start = time.perf_counter()
+        count = fn(ChatRepository(db), user_id, data)
+        elapsed = time.perf_counter() - start
+    print(
+        f"{label:<28} {elapsed:7.2f} s {count / elapsed:9.0f} messages/s "
+        f"{counter.statements:6d} statements {counter.commits:6d} commits"
+    )
+
+
+def main(turns: int, messages: int, conversations: int, batch_size: int) -> None:
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        user = User(username="bench", email="bench@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    counter = Counter()
+
+    print(f"chat turns ({turns} each, file-backed SQLite)")
+    run_turns("separate commits", separate_commits, counter, user_id, turns)
+    run_turns("ChatTurn unit of work", chat_turn, counter, user_id, turns)
+
+    data = history(conversations, messages)
+    print(f"\nimport of {messages} messages in {conversations} conversations")
+    run_import("row by row", import_row_by_row, counter, user_id, data)
+    run_import(
+        f"executemany, batch {batch_size}",
+        lambda repo, uid, rows: repo.import_conversations(uid, rows, batch_size=batch_size)[1],
+        counter, user_id, data,
+    )
+    with SessionLocal() as db:
+        print(f"\nmessages stored: {db.query(Message).count()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.turns, args.messages, args.conversations, args.batch_size)
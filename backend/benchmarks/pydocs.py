@@ -0,0 +1,144 @@
+"""Python-docs style HTML pages for the offline benchmarks.
+
+Pages are rendered from the topic texts that ship with CPython (pydoc_data) and wrapped in
+the chrome a Sphinx page carries: head scripts and styles, a related-links nav, a sidebar
+with the full topic index, and a footer. Pass a directory of saved pages instead to
+benchmark against real downloads, or write the generated ones out with:
+    python -m benchmarks.pydocs --out fixtures/pydocs
+"""
+import argparse
+import html
+import os
+import re
+
+from pydoc_data.topics import topics
+
+_UNDERLINE_RE = re.compile(r"^([*=\-~^\"])\1{3,}$")
+
+_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8" />
+<title>{title} &#8212; Python 3 documentation</title>
+<link rel="stylesheet" href="_static/pygments.css" type="text/css" />
+<style>
+body {{ font-family: sans-serif; margin: 0; }}
+div.sphinxsidebar {{ float: left; width: 230px; }}
+div.body {{ margin-left: 240px; max-width: 900px; }}
+pre {{ background: #f8f8f8; padding: 5px; }}
+</style>
+<script>
+var DOCUMENTATION_OPTIONS = {{ VERSION: '3', LANGUAGE: 'en', HAS_SOURCE: true }};
+document.addEventListener('DOMContentLoaded', function () {{
+  document.querySelectorAll('a.headerlink').forEach(function (el) {{ el.title = 'Link to this heading'; }});
+}});
+</script>
+</head>
+<body>
+<div class="mobile-nav"><input type="checkbox" id="menuToggler" /><label for="menuToggler">Menu</label></div>
+<div class="related" role="navigation" aria-label="Related">
+<h3>Navigation</h3>
+<ul>
+<li><a href="genindex.html" title="General Index">index</a></li>
+<li><a href="py-modindex.html" title="Python Module Index">modules</a> |</li>
+<li><a href="index.html">Python 3 documentation</a> &#187;</li>
+<li><a href="reference/index.html">The Python Language Reference</a> &#187;</li>
+</ul>
+</div>
+<div class="document">
+<div class="documentwrapper"><div class="bodywrapper"><div class="body" role="main">
+"""
+
+_TAIL = """</div></div></div>
+<nav class="sphinxsidebar" role="navigation" aria-label="Main">
+<h3>Table of Contents</h3>
+<ul>
+{toc}
+</ul>
+<div id="searchbox" role="search"><form class="search" action="search.html" method="get">
+<input type="text" name="q" aria-labelledby="searchlabel" /><input type="submit" value="Go" /></form></div>
+</nav>
+</div>
+<footer class="footer">&#169; Copyright 2001-2024, Python Software Foundation. This page is licensed under the
+Python Software Foundation License Version 2. <a href="license.html">History and License</a>.
+Please <a href="bugs.html">report a bug</a>.</footer>
+<script src="_static/documentation_options.js"></script>
+<script>window.addEventListener('load', function () {{ console.log('{name} loaded'); }});</script>
+</body>
+</html>
+"""
+
+
+def _render_body(text: str) -> str:
+    parts = []
+    paragraph = []
+    code = []
+    lines = text.splitlines()
+
+    def flush_paragraph():
+        if paragraph:
+            parts.append(f"<p>{html.escape(' '.join(paragraph))}</p>")
+            paragraph.clear()
+
+    def flush_code():
+        if code:
+            while code and not code[-1].strip():
+                code.pop()
+            parts.append(f'<div class="highlight"><pre>{html.escape(chr(10).join(code))}</pre></div>')
+            code.clear()
+
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        following = lines[index + 1] if index + 1 < len(lines) else ""
+        if line.strip() and _UNDERLINE_RE.match(following.strip()) and len(following.strip()) >= len(line.strip()):
+            flush_paragraph()
+            flush_code()
+            tag = "h1" if following.strip()[0] == "*" else "h2"
+            title = html.escape(line.strip())
+            parts.append(f'<{tag}>{title}<a class="headerlink" href="#" title="Permalink">¶</a></{tag}>')
+            index += 2
+            continue
+        if line.startswith(("   ", "+-", "+=", "|")) or (code and not line.strip()):
+            flush_paragraph()
+            code.append(line[3:] if line.startswith("   ") else line)
+        elif not line.strip():
+            flush_paragraph()
+            flush_code()
+        else:
+            flush_code()
+            paragraph.append(line.strip())
+        index += 1
+    flush_paragraph()
+    flush_code()
+    return "\n".join(parts)
+
+
+def render_page(name: str) -> str:
+    text = topics[name]
+    title = text.splitlines()[0].strip()
+    toc = "\n".join(f'<li><a href="{topic}.html">{html.escape(topic)}</a></li>' for topic in sorted(topics))
+    return _HEAD.format(title=html.escape(title)) + _render_body(text) + _TAIL.format(toc=toc, name=name)
+
+
+def load_corpus(directory: str = None) -> dict[str, str]:
+    """Returns {file name: html}; saved pages from `directory` if given, otherwise rendered topics."""
+    if directory:
+        corpus = {}
+        for name in sorted(os.listdir(directory)):
+            if name.endswith((".html", ".htm")):
+                with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as f:
+                    corpus[name] = f.read()
+        return corpus
+    return {f"{name}.html": render_page(name) for name in sorted(topics)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+    for name, page in load_corpus().items():
+        with open(os.path.join(args.out, name), "w", encoding="utf-8") as f:
+            f.write(page)
+    print(f"Wrote {len(topics)} pages to {args.out}")
@@ -0,0 +1,105 @@
+"""Query-plan regression check for the chat hot paths.
+
+Builds a SQLite database with `alembic upgrade head`, runs the ChatRepository reads, and checks
+with EXPLAIN QUERY PLAN that each one is served by its composite index: no full scan of
+messages/conversations and no temporary B-tree for ORDER BY. Exits non-zero on a regression;
+tests/test_query_plans.py runs the same checks under pytest.
+
+Run from the backend directory:
+    python -m benchmarks.query_plans
+"""
+import os
+import sys
+from datetime import datetime
+
+from benchmarks.fakes import configure_environment
+
+configure_environment()
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event, text
+
+from app.repository.chat_repository import ChatRepository
+from app.repository.db import SessionLocal, engine
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CURSOR = (datetime(2025, 1, 1), 10)
+
+CASES = [
+    ("history of a conversation", "ix_messages_user_conversation_created",
+     lambda repo: repo.get_user_history(1, conversation_id=1)),
+    ("history page of a conversation", "ix_messages_user_conversation_created",
+     lambda repo: repo.get_history_page(1, conversation_id=1, limit=50, before=CURSOR)),
+    ("history page of a user", "ix_messages_user_created",
+     lambda repo: repo.get_history_page(1, limit=50, after=CURSOR)),
+    ("conversation list", "ix_conversations_user_created",
+     lambda repo: repo.get_user_conversations(1)),
+    ("conversation list page", "ix_conversations_user_created",
+     lambda repo: repo.get_conversations_page(1, limit=50, before=CURSOR)),
+]
+
+
+def capture_statement(fn) -> tuple[str, tuple]:
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    db = SessionLocal()
+    try:
+        fn(ChatRepository(db))
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured[-1]
+
+
+def explain(statement: str, parameters: tuple) -> list[str]:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def check_plan(plan: list[str], index: str) -> list[str]:
+    problems = []
+    if not any(index in step for step in plan):
+        problems.append(f"does not use {index}")
+    for step in plan:
+        if step.startswith("SCAN") and "USING" not in step:
+            problems.append(f"full scan: {step}")
+        if "TEMP B-TREE" in step:
+            problems.append(f"sorts in a temporary B-tree: {step}")
+    return problems
+
+
+def prepare_database() -> None:
+    """Migrates the configured database to head and adds the rows the cases read."""
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    command.upgrade(config, "head")
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, username, email, password_hash) VALUES (1, 'plan', 'plan@example.com', 'x')"))
+        conn.execute(text("INSERT INTO conversations (id, user_id, title) VALUES (1, 1, 'Plan')"))
+        conn.execute(text("ANALYZE"))
+
+
+def run() -> int:
+    prepare_database()
+    failures = 0
+    for name, index, fn in CASES:
+        plan = explain(*capture_statement(fn))
+        problems = check_plan(plan, index)
+        status = "FAIL" if problems else "ok"
+        print(f"[{status}] {name}")
+        for step in plan:
+            print(f"         {step}")
+        for problem in problems:
+            print(f"         -> {problem}")
+        failures += bool(problems)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
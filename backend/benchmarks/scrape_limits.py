@@ -0,0 +1,98 @@
+"""Checks that scrape_url skips binary responses and caps oversized ones, against a local server.
+
+Each case reports the extracted text size, time, and the peak Python memory allocated
+during the fetch (tracemalloc); the run exits non-zero if any expectation fails.
+tests/test_scrape_limits.py runs the same cases under pytest.
+
+Run from the backend directory:
+    python -m benchmarks.scrape_limits [--max-bytes 2097152]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from benchmarks.pydocs import render_page
+from benchmarks.stub_server import StubServer
+
+MB = 1024 * 1024
+
+
+def build_pages() -> dict[str, tuple[bytes, str]]:
+    page = render_page("typesseq-mutable")
+    head, body = page.split("<body>", 1)
+    section = body.split("</body>", 1)[0]
+    huge = head + "<body>" + section * (24 * MB // len(section)) + "</body></html>"
+    noise = random.Random(0).randbytes(8 * MB)
+    return {
+        "/doc.html": (page.encode(), "text/html; charset=utf-8"),
+        "/huge.html": (huge.encode(), "text/html; charset=utf-8"),
+        "/changelog.txt": (("- Fixed a bug in list.sort()\n" * (12 * MB // 28)).encode(), "text/plain"),
+        "/manual.pdf": (b"%PDF-1.7\n" + noise, "application/pdf"),
+        "/download": (noise, "application/octet-stream"),
+        "/mislabelled.html": (b"\x00\x01\x02" + noise, "text/html"),
+    }
+
+
+def build_expectations(max_bytes: int) -> dict:
+    return {
+        "/doc.html": lambda text: "s.append(x)" in text,
+        "/huge.html": lambda text: 0 < len(text) <= max_bytes,
+        "/changelog.txt": lambda text: 0 < len(text) <= max_bytes,
+        "/manual.pdf": lambda text: text == "",
+        "/download": lambda text: text == "",
+        "/mislabelled.html": lambda text: text == "",
+    }
+
+
+def memory_limit(max_bytes: int) -> int:
+    return 8 * max_bytes
+
+
+async def measure(agent, url: str) -> tuple[str, float, int]:
+    """Scrapes `url` and returns the text, seconds taken and peak traced memory."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        text = await agent.scrape_url(url)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return text, elapsed, peak
+
+
+async def run(max_bytes: int) -> bool:
+    os.environ.setdefault("PAGE_CACHE_BACKEND", "none")
+    os.environ["SCRAPE_MAX_BYTES"] = str(max_bytes)
+    from app.core.chat_agent import ChatAgent
+
+    agent = ChatAgent(api_key="benchmark")
+    pages = build_pages()
+    expectations = build_expectations(max_bytes)
+    limit = memory_limit(max_bytes)
+
+    ok = True
+    print(f"byte cap {max_bytes}, memory limit {limit}\n")
+    print(f"{'path':<18} {'served':>10} {'text':>10} {'time':>8} {'peak mem':>10}  result")
+    with StubServer(pages=pages) as server:
+        await agent.scrape_url(server.url("/doc.html"))
+        for path, (body, _) in pages.items():
+            text, elapsed, peak = await measure(agent, server.url(path))
+            passed = expectations[path](text) and peak < limit
+            ok = ok and passed
+            print(
+                f"{path:<18} {len(body):>10} {len(text):>10} {elapsed * 1000:>6.0f}ms {peak:>10}  "
+                f"{'ok' if passed else 'FAIL'}"
+            )
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-bytes", type=int, default=2 * MB)
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.max_bytes)) else 1)
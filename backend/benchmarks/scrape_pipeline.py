@@ -0,0 +1,44 @@
+"""Compares serial scraping with ChatAgent.fetch_context against a local stub server.
+
+Run from the backend directory:
+    python -m benchmarks.scrape_pipeline --latency 0.5 1.0 2.0
+"""
+import argparse
+import asyncio
+import os
+import time
+
+# The serial pass would fill the page cache and the concurrent pass would only read it back.
+os.environ.setdefault("PAGE_CACHE_BACKEND", "none")
+
+from app.core.chat_agent import ChatAgent
+from benchmarks.stub_server import StubServer
+
+
+async def run(latencies: list[float], deadline: float) -> None:
+    paths = {f"/page-{i}": latency for i, latency in enumerate(latencies)}
+    agent = ChatAgent(api_key="benchmark")
+
+    with StubServer(latencies=paths) as server:
+        results = [{"href": server.url(path), "title": path} for path in paths]
+
+        start = time.perf_counter()
+        serial = [await agent.scrape_url(result["href"]) for result in results]
+        serial_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pages, _ = await agent.fetch_context(results, deadline=deadline)
+        concurrent_elapsed = time.perf_counter() - start
+
+    print(f"latencies:          {latencies}")
+    print(f"sum / max:          {sum(latencies):.2f}s / {max(latencies):.2f}s")
+    print(f"serial scrape:      {serial_elapsed:.2f}s ({sum(1 for text in serial if text)} pages)")
+    print(f"concurrent scrape:  {concurrent_elapsed:.2f}s ({len(pages)} pages, deadline {deadline}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, nargs="+", default=[0.5, 1.0, 2.0])
+    parser.add_argument("--deadline", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.latency, args.deadline))
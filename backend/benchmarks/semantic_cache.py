@@ -0,0 +1,124 @@
+"""Semantic cache at scale: build, save, memory-mapped load and lookup latency at 100k entries.
+
+Also scores a small set of labelled question pairs, to show what the configured
+threshold accepts as "the same question" with the hashing embedder.
+
+Run from the backend directory:
+    python -m benchmarks.semantic_cache --entries 100000
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app.core.answer_cache import CachedAnswer
+from app.core.semantic_cache import SEMANTIC_CACHE_THRESHOLD, HashingEmbedder, SemanticCache
+
+VERBS = ["reverse", "sort", "copy", "merge", "split", "join", "filter", "flatten", "shuffle", "slice",
+         "iterate over", "convert", "serialize", "parse", "compare", "deduplicate", "count items in", "search"]
+OBJECTS = ["a list", "a dict", "a tuple", "a set", "a string", "a file", "a json object", "a csv file",
+           "a dataframe", "a numpy array", "a generator", "bytes", "a datetime", "a path", "a queue", "nested lists"]
+MODIFIERS = ["", "in place", "by key", "by value", "without a loop", "recursively", "in reverse order",
+             "with a lambda", "efficiently", "using itertools", "with type hints", "in one line",
+             "for large inputs", "asynchronously", "safely", "with unicode", "in python 3.12"]
+PREFIXES = ["how to", "how do i", "what is the best way to", "can i", "is there a builtin to"]
+
+PAIRS = [
+    ("how to sort a dict by value", "sort dict by values", True),
+    ("How do I reverse a list?", "how to reverse list in python", True),
+    ("read a file line by line", "how to read file lines", True),
+    ("convert a string to an int", "how to convert string to int in python", True),
+    ("what is a list comprehension", "list comprehensions", True),
+    ("how to reverse a list", "how to sort a list", False),
+    ("how to reverse a list", "how to reverse a string", False),
+    ("merge two dicts", "merge two lists", False),
+    ("convert string to int", "convert int to string", False),
+    ("what is a decorator", "what is a generator", False),
+]
+
+
+def synthetic_questions(count: int, rng: random.Random) -> list[str]:
+    combos = list(itertools.product(PREFIXES, VERBS, OBJECTS, MODIFIERS))
+    rng.shuffle(combos)
+    questions = [" ".join(part for part in combo if part) + "?" for combo in combos]
+    while len(questions) < count:
+        questions += [f"{question} (variant {len(questions)})" for question in questions[:count - len(questions)]]
+    return questions[:count]
+
+
+def run(entries: int, lookups: int, batch: int, dim: int) -> None:
+    rng = random.Random(0)
+    questions = synthetic_questions(entries, rng)
+    answer = CachedAnswer("Use sorted(items, key=...)", ["https://docs.python.org/3/howto/sorting.html"], 1.5)
+    path = os.path.join(tempfile.mkdtemp(prefix="semantic-cache-"), "index")
+
+    cache = SemanticCache("benchmark", HashingEmbedder(dim), path=path, save_every=0, max_entries=entries)
+    start = time.perf_counter()
+    for offset in range(0, entries, 1000):
+        chunk = questions[offset:offset + 1000]
+        cache.add_batch(chunk, [answer] * len(chunk))
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cache.save()
+    save = time.perf_counter() - start
+
+    start = time.perf_counter()
+    # Room for the 100 adds below, so the save after them appends instead of trimming and rewriting.
+    loaded = SemanticCache("benchmark", HashingEmbedder(dim), path=path, save_every=0, max_entries=entries + 100)
+    load = time.perf_counter() - start
+
+    probes = [rng.choice(questions).replace("?", "").lower() for _ in range(lookups)]
+    latencies = []
+    for probe in probes:
+        start = time.perf_counter()
+        loaded.lookup(probe)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    start = time.perf_counter()
+    for offset in range(0, lookups, batch):
+        loaded.lookup_batch(probes[offset:offset + batch])
+    batched = (time.perf_counter() - start) / lookups
+
+    embedder = HashingEmbedder(dim)
+    start = time.perf_counter()
+    embedder.embed(probes)
+    embed = (time.perf_counter() - start) / lookups
+
+    loaded.add_batch([f"{question} (again)" for question in questions[:100]], [answer] * 100)
+    start = time.perf_counter()
+    loaded.save()
+    append = time.perf_counter() - start
+
+    stats = loaded.stats()
+    print(f"entries:                  {len(loaded)} x {dim} float32 ({len(loaded) * dim * 4 / 1e6:.0f} MB)")
+    print(f"build / save / load:      {build:.2f}s / {save:.2f}s / {load * 1000:.0f}ms "
+          f"({stats['memory_mapped_entries']} entries memory-mapped)")
+    print(f"save after 100 adds:      {append * 1000:.1f}ms (appended, not rewritten)")
+    print(f"embed one query:          {embed * 1e6:.0f}us")
+    print(f"lookup p50 / p99:         {statistics.median(latencies) * 1000:.2f}ms / "
+          f"{latencies[int(len(latencies) * 0.99)] * 1000:.2f}ms")
+    print(f"batched lookup ({batch}):     {batched * 1000:.3f}ms per query")
+    print(f"hit ratio on probes:      {stats['hit_ratio']:.1%} at threshold {loaded.threshold}")
+
+    print(f"\nlabelled pairs (threshold {SEMANTIC_CACHE_THRESHOLD}):")
+    for first, second, same in PAIRS:
+        vectors = embedder.embed([first, second])
+        score = float(vectors[0] @ vectors[1])
+        verdict = "hit" if score >= SEMANTIC_CACHE_THRESHOLD else "miss"
+        expected = "hit" if same else "miss"
+        print(f"  {score:.2f} {verdict:<4} {'ok ' if verdict == expected else 'BAD'} {first!r} vs {second!r}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--dim", type=int, default=256)
+    args = parser.parse_args()
+    run(args.entries, args.lookups, args.batch, args.dim)
@@ -0,0 +1,87 @@
+import hashlib
+import multiprocessing
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PAGE = (
+    "<html><head><title>{path}</title><style>body {{ color: red; }}</style></head>"
+    "<body><nav>Home | Docs</nav><h1>Page {path}</h1>"
+    "<p>Lists can be reversed in place with list.reverse().</p>"
+    "<pre>items = [1, 2, 3]\nitems.reverse()</pre>"
+    "<script>console.log('tracking');</script></body></html>"
+)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def _serve(host: str, latencies: dict[str, float], pages: dict[str, tuple[bytes, str]], ready) -> None:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(latencies.get(self.path, 0))
+            page = pages.get(self.path)
+            if page is None:
+                body = DEFAULT_PAGE.format(path=self.path).encode()
+                content_type = "text/html; charset=utf-8"
+            else:
+                body, content_type = page
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except ConnectionError:
+                pass  # the client stopped reading, e.g. at its byte cap
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = _Server((host, 0), Handler)
+    ready.put(httpd.server_address[1])
+    httpd.serve_forever()
+
+
+class StubServer:
+    """Local HTTP server that serves canned pages with a configurable delay per path.
+
+    It runs in a child process so its threads do not compete with the code under test for the GIL.
+    """
+
+    def __init__(self, latencies: dict[str, float] = None, pages: dict[str, tuple[bytes, str]] = None, host: str = "127.0.0.1"):
+        self.host = host
+        self.port = None
+        ready = multiprocessing.Queue()
+        self._ready = ready
+        self.process = multiprocessing.Process(
+            target=_serve, args=(host, latencies or {}, pages or {}, ready), daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def __enter__(self):
+        self.process.start()
+        self.port = self._ready.get(timeout=10)
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.join()
@@ -1,9 +1,17 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.sql import func
 
 Base = declarative_base()
 
+# SQLite's CURRENT_TIMESTAMP has no fractional seconds; bind datetimes in the same format so
+# (created_at, id) pagination cursors compare equal to stored values.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -13,7 +21,7 @@ class User(Base):
     password_hash = Column(String(255), nullable=False)
     encrypted_api_key = Column(String(500), nullable=True)
     recovery_tokens = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     
     conversations = relationship("Conversation", back_populates="user")
     messages = relationship("Message", back_populates="user")
@@ -24,20 +32,36 @@ class Conversation(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String(200), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+    summary = Column(Text, nullable=True)
+    summary_message_id = Column(Integer, nullable=True)
 
     user = relationship("User", back_populates="conversations")
-    messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
+    messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (
+        Index("ix_conversations_user_created", "user_id", "created_at", "id", mssql_include=["title"]),
+    )
 
 class Message(Base):
     __tablename__ = "messages"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=True)
+    conversation_id = Column(
+        Integer,
+        ForeignKey("conversations.id", name="fk_messages_conversation_id_conversations", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
     query = Column(Text, nullable=False)
     response = Column(Text, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
 
     user = relationship("User", back_populates="messages")
-    conversation = relationship("Conversation", back_populates="messages")
\ No newline at end of file
+    conversation = relationship("Conversation", back_populates="messages")
+
+    __table_args__ = (
+        Index("ix_messages_user_conversation_created", "user_id", "conversation_id", "created_at", "id"),
+        Index("ix_messages_user_created", "user_id", "created_at", "id"),
+    )
@@ -1,13 +1,33 @@
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, Response
 from app.api.endpoints.users import router as users_router
 from app.api.endpoints.chat import router as chat_router
+from app.api.endpoints.stats import router as stats_router, stats_metrics
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, registry, render_metrics
+from app.core.scrape_client import close_scrape_client
+from app.core.security import load_master_key
+from app.core.semantic_cache import save_semantic_cache
+from app.core.title_queue import stop_title_queue
+from app.core.tracing import TracingMiddleware, shutdown_tracing
 
 LOCALHOST = "127.0.0.1"
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    load_master_key()
+    yield
+    await stop_title_queue()
+    await close_scrape_client()
+    save_semantic_cache()
+    shutdown_tracing()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+registry.add_collector(stats_metrics)
 
 origins = [
     "http://localhost:5173", 
@@ -20,14 +40,20 @@ app.add_middleware(
     allow_credentials=True,          
     allow_methods=["*"],            
     allow_headers=["*"],             
+    expose_headers=["X-Has-More", "X-Before-Cursor", "X-After-Cursor"],
 )
 
 @app.get("/")
 def root():
     return RedirectResponse(url="/docs")
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
 app.include_router(users_router)
 app.include_router(chat_router)
+app.include_router(stats_router)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host=LOCALHOST, port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""Imports chat history exported from another tool into a user's conversations.
+
+The file is JSON, either {"conversations": [...]} (the POST /chat/import body) or just the list:
+    [{"title": "...", "messages": [{"query": "...", "response": "...", "created_at": "2024-05-01T12:00:00Z"}]}]
+
+Run from the backend directory:
+    python -m scripts.import_history --email user@example.com history.json [--batch-size 1000]
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+
+from app.repository.chat_repository import IMPORT_BATCH_SIZE, ChatRepository
+from app.repository.db import SessionLocal
+from data.models import User
+
+
+def load_conversations(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    conversations = data["conversations"] if isinstance(data, dict) else data
+    for conversation in conversations:
+        for message in conversation.get("messages", []):
+            created_at = message.get("created_at")
+            if created_at:
+                message["created_at"] = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+    return conversations
+
+
+def import_history(email: str, path: str, batch_size: int) -> None:
+    conversations = load_conversations(path)
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == email).first()
+        if user is None:
+            raise SystemExit(f"No user with email {email}")
+        start = time.perf_counter()
+        imported_conversations, imported_messages = ChatRepository(db).import_conversations(
+            user.id, conversations, batch_size=batch_size
+        )
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - start
+    print(
+        f"Imported {imported_conversations} conversation(s) and {imported_messages} message(s) "
+        f"in {elapsed:.2f}s ({imported_messages / max(elapsed, 1e-9):.0f} messages/s)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+    import_history(args.email, args.path, args.batch_size)
@@ -0,0 +1,63 @@
+"""Re-encrypts legacy "salt.token" values in users.encrypted_api_key and users.recovery_tokens
+into the versioned v2 format.
+
+Run from the backend directory after deploying the v2 code:
+    python -m scripts.rewrap_secrets [--dry-run] [--batch-size 500]
+"""
+import argparse
+
+from app.core.security import SECRET_KEY, decrypt_data, encrypt_data, is_legacy_ciphertext
+from app.repository.db import SessionLocal
+from data.models import User
+
+REWRAPPED_COLUMNS = ("encrypted_api_key", "recovery_tokens")
+
+
+def rewrap(batch_size: int, dry_run: bool) -> None:
+    db = SessionLocal()
+    rewrapped = failed = 0
+    last_id = 0
+    try:
+        while True:
+            users = (
+                db.query(User)
+                .filter(User.id > last_id)
+                .order_by(User.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not users:
+                break
+
+            for user in users:
+                for column in REWRAPPED_COLUMNS:
+                    value = getattr(user, column)
+                    if not is_legacy_ciphertext(value):
+                        continue
+                    plain = decrypt_data(value, SECRET_KEY)
+                    if plain is None:
+                        print(f"User {user.id}: could not decrypt {column}, left unchanged")
+                        failed += 1
+                        continue
+                    setattr(user, column, encrypt_data(plain, SECRET_KEY))
+                    rewrapped += 1
+
+            last_id = users[-1].id
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+            print(f"Processed users up to id {last_id}: {rewrapped} value(s) rewrapped so far")
+    finally:
+        db.close()
+
+    action = "Would rewrap" if dry_run else "Rewrapped"
+    print(f"{action} {rewrapped} value(s); {failed} value(s) could not be decrypted")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    rewrap(args.batch_size, args.dry_run)
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from benchmarks.fakes import configure_environment
+
+# Must run before anything imports `app`: settings are read at import time.
+configure_environment()
+os.environ.setdefault("PAGE_CACHE_BACKEND", "none")
+
+from app.core import gemini_clients, search  # noqa: E402
+from app.core.security import load_master_key  # noqa: E402
+from app.repository import db, user_repository  # noqa: E402
+from app.repository.pool_metrics import PoolStats  # noqa: E402
+from benchmarks.fakes import fake_genai_client  # noqa: E402
+from data.models import Base  # noqa: E402
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """A fresh SQLite database behind SessionLocal, for tests that write rows."""
+    primary = db.engine
+    new_engine = db._create_engine(f"sqlite:///{tmp_path / 'app.db'}", PoolStats())
+    Base.metadata.create_all(new_engine)
+    monkeypatch.setattr(db, "engine", new_engine)
+    db.SessionLocal.configure(bind=new_engine)
+    user_repository._user_cache.clear()
+    yield new_engine
+    db.SessionLocal.configure(bind=primary)
+    user_repository._user_cache.clear()
+    new_engine.dispose()
+
+
+@pytest.fixture
+def fake_gemini(monkeypatch):
+    """Answers chat turns with benchmarks.fakes instead of the Gemini API, and searches nothing."""
+    monkeypatch.setattr(gemini_clients.genai, "Client", fake_genai_client(0))
+    monkeypatch.setattr(gemini_clients, "_client_pool", None)
+    monkeypatch.setattr(search, "_search_provider", search.StaticSearchProvider([]))
+    search.get_search_cache().clear()
+    load_master_key()
@@ -0,0 +1,64 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.api.deps import get_current_user
+from app.api.dtos.users.user_update import UserUpdate
+from app.core.security import create_access_token, user_token_claims
+from app.repository.db import SessionLocal
+from app.repository.user_repository import UserRepository
+
+
+def bearer(claims: dict) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token(claims))
+
+
+@pytest.fixture
+def user(database):
+    with SessionLocal() as db:
+        return UserRepository(db).create("alice", "alice@example.com", "hash")
+
+
+def authenticate(credentials: HTTPAuthorizationCredentials):
+    with SessionLocal() as db:
+        return get_current_user(credentials, db)
+
+
+def test_token_is_rejected_after_a_password_change(user):
+    credentials = bearer(user_token_claims(user))
+    assert authenticate(credentials).id == user.id
+
+    with SessionLocal() as db:
+        repo = UserRepository(db)
+        changed = repo.update_password(repo.get_by_id(user.id), "new-hash")
+        fresh = bearer(user_token_claims(changed))
+
+    with pytest.raises(HTTPException) as error:
+        authenticate(credentials)
+    assert error.value.status_code == 401
+    assert authenticate(fresh).id == user.id
+
+
+@pytest.mark.parametrize("write, check", [
+    (lambda repo, row: repo.update_user(row.id, UserUpdate(username="bob")), lambda cached: cached.username == "bob"),
+    (lambda repo, row: repo.update_password(row, "new-hash"), lambda cached: cached.password_hash == "new-hash"),
+    (lambda repo, row: repo.update_api_key(row, "v2.key"), lambda cached: cached.encrypted_api_key == "v2.key"),
+    (lambda repo, row: repo.update_recovery_tokens(row, "v2.tokens"), lambda cached: cached.recovery_tokens == "v2.tokens"),
+    (lambda repo, row: repo.delete(row), lambda cached: cached is None),
+])
+def test_user_writes_invalidate_the_user_cache(user, write, check):
+    with SessionLocal() as db:
+        repo = UserRepository(db)
+        cached = repo.get_cached_by_id(user.id)
+        assert repo.get_cached_by_id(user.id) is cached
+        write(repo, repo.get_by_id(user.id))
+
+    with SessionLocal() as db:
+        assert check(UserRepository(db).get_cached_by_id(user.id))
+
+
+def test_legacy_tokens_without_uid_fall_back_to_the_username(user):
+    assert authenticate(bearer({"sub": "alice"})).id == user.id
+
+    with pytest.raises(HTTPException):
+        authenticate(bearer({"sub": "mallory"}))
@@ -0,0 +1,19 @@
+import pytest
+
+from app.core.answer_cache import normalize_question
+from app.core.search import normalize_query, tokenize
+
+
+@pytest.mark.parametrize("variant", ["reverse a list.", "Reverse a list?", "reverse a list", "reverse - a list..."])
+def test_sentence_punctuation_does_not_change_the_keys(variant):
+    assert normalize_question(variant) == "reverse a list"
+    assert normalize_query(variant) == "reverse list"
+
+
+def test_names_with_dots_and_symbols_stay_whole():
+    assert tokenize("Use list.sort(), not .sort- in C++ or C#.") == ["use", "list.sort", "not", "sort", "in", "c++", "or", "c#"]
+
+
+def test_stopwords_only_drop_from_search_queries():
+    assert normalize_question("is it sorted") == "is it sorted"
+    assert normalize_query("is it sorted") == "sorted"
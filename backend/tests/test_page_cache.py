@@ -0,0 +1,101 @@
+import asyncio
+import multiprocessing
+
+import pytest
+
+from app.core import page_cache
+from app.core.chat_agent import ChatAgent
+from app.core.page_cache import CachedPage, MemoryPageCache, SQLitePageCache, normalize_url
+from app.core.scrape_client import close_scrape_client
+from benchmarks.stub_server import StubServer
+
+
+@pytest.fixture(scope="module")
+def server():
+    with StubServer() as server:
+        yield server
+
+
+def scrape_twice(cache: page_cache.PageCache, url: str, monkeypatch) -> tuple[str, str]:
+    monkeypatch.setattr(page_cache, "_page_cache", cache)
+
+    async def run():
+        agent = ChatAgent(api_key="test")
+        try:
+            return await agent.scrape_url(url), await agent.scrape_url(url)
+        finally:
+            await close_scrape_client()
+
+    return asyncio.run(run())
+
+
+def page(url: str, size: int) -> CachedPage:
+    return CachedPage(url=url, text="x" * size)
+
+
+def test_fresh_page_is_served_from_cache(server, monkeypatch):
+    cache = MemoryPageCache(ttl=60)
+    first, second = scrape_twice(cache, server.url("/fresh"), monkeypatch)
+    assert first and first == second
+    assert (cache.misses, cache.hits, cache.revalidations) == (1, 1, 0)
+
+
+def test_stale_page_is_revalidated_with_etag(server, monkeypatch):
+    cache = MemoryPageCache(ttl=0)
+    first, second = scrape_twice(cache, server.url("/stale"), monkeypatch)
+    assert first and first == second
+    # The stub answers If-None-Match with 304, so the cached text is reused.
+    assert (cache.misses, cache.stale, cache.revalidations) == (1, 1, 1)
+    assert cache.get(server.url("/stale")).etag
+
+
+def test_ttl_freshness():
+    assert CachedPage(url="u", text="t").is_fresh(60)
+    assert not CachedPage(url="u", text="t", fetched_at=0).is_fresh(60)
+
+
+def test_urls_are_normalized():
+    assert normalize_url("HTTP://Example.com:80/a?b=2&utm_source=x&a=1#top") == "http://example.com/a?a=1&b=2"
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def bounded_cache(request, tmp_path):
+    if request.param == "memory":
+        return MemoryPageCache(max_bytes=250)
+    return SQLitePageCache(str(tmp_path / "pages.sqlite3"), max_bytes=250)
+
+
+def test_eviction_is_bounded_by_bytes_and_least_recently_used(bounded_cache):
+    bounded_cache.set(page("http://a/1", 100))
+    bounded_cache.set(page("http://a/2", 100))
+    assert bounded_cache.get("http://a/1") is not None
+    bounded_cache.set(page("http://a/3", 100))
+
+    assert bounded_cache.get("http://a/2") is None
+    assert bounded_cache.get("http://a/1") is not None
+    assert bounded_cache.get("http://a/3") is not None
+    assert bounded_cache.total_bytes() <= 250
+    assert bounded_cache.evictions == 1
+
+
+def test_oversized_page_is_not_cached(bounded_cache):
+    bounded_cache.set(page("http://a/big", 300))
+    assert bounded_cache.get("http://a/big") is None
+    assert bounded_cache.total_bytes() == 0
+
+
+def _write_page(path: str, url: str) -> None:
+    SQLitePageCache(path).set(CachedPage(url=url, text="from another worker", etag='"v1"'))
+
+
+def test_sqlite_cache_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    cache = SQLitePageCache(path)
+    process = multiprocessing.Process(target=_write_page, args=(path, "http://a/shared"))
+    process.start()
+    process.join(timeout=10)
+    assert process.exitcode == 0
+
+    cached = cache.get("http://a/shared")
+    assert cached is not None
+    assert (cached.text, cached.etag) == ("from another worker", '"v1"')
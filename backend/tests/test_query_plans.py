@@ -0,0 +1,14 @@
+import pytest
+
+from benchmarks.query_plans import CASES, capture_statement, check_plan, explain, prepare_database
+
+
+@pytest.fixture(scope="module", autouse=True)
+def database():
+    prepare_database()
+
+
+@pytest.mark.parametrize("name, index, fn", CASES, ids=[case[0] for case in CASES])
+def test_query_uses_index(name, index, fn):
+    plan = explain(*capture_statement(fn))
+    assert check_plan(plan, index) == [], "\n".join(plan)
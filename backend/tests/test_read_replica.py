@@ -0,0 +1,99 @@
+"""Read-replica routing, with two SQLite files standing in for a primary and a lagging replica.
+
+The replica is a copy of the primary taken once after the first user registers and never
+updated, so anything written later is missing there, as under replication lag.
+"""
+import asyncio
+import shutil
+import time
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app.core.scrape_client import close_scrape_client
+from app.core.ttl_cache import TTLCache
+from app.repository import db
+from app.repository.pool_metrics import PoolStats
+from data.models import Base
+from main import app
+
+STICKY_SECONDS = 0.5
+
+
+class Statements:
+    def __init__(self, primary, replica):
+        self.counts = {"primary": 0, "replica": 0}
+        event.listen(primary, "before_cursor_execute", lambda *args: self._count("primary"))
+        event.listen(replica, "before_cursor_execute", lambda *args: self._count("replica"))
+
+    def _count(self, name: str) -> None:
+        self.counts[name] += 1
+
+    def take(self) -> dict:
+        counts = dict(self.counts)
+        self.counts = {"primary": 0, "replica": 0}
+        return counts
+
+
+@pytest.fixture
+def replica(database, fake_gemini, tmp_path, monkeypatch):
+    path = tmp_path / "replica.db"
+    read_engine = db._create_engine(f"sqlite:///{path}", PoolStats())
+    Base.metadata.create_all(read_engine)
+    monkeypatch.setattr(db, "read_engine", read_engine)
+    monkeypatch.setattr(db, "read_pool_stats", PoolStats())
+    monkeypatch.setattr(db, "_recent_writers", TTLCache(maxsize=1000, ttl=STICKY_SECONDS))
+
+    def snapshot() -> Statements:
+        """Copies the primary over the replica; the replica gets nothing written after this."""
+        database.dispose()
+        read_engine.dispose()
+        shutil.copyfile(database.url.database, path)
+        return Statements(database, read_engine)
+
+    yield snapshot
+    read_engine.dispose()
+
+
+async def register(client: httpx.AsyncClient, name: str) -> dict:
+    response = await client.post("/users/register", json={
+        "email": f"{name}@example.com", "username": name, "password": "secret-password", "gemini_api_key": "key",
+    })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_reads_go_to_the_replica_except_right_after_a_write(replica):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replica") as client:
+            alice = await register(client, "alice")
+            statements = replica()
+
+            # A user who just registered can use their token at once, before the replica has them.
+            bob = await register(client, "bob")
+            assert (await client.get("/chat/conversations", headers=bob)).status_code == 200
+
+            conversation_id = (await client.post("/chat/new", json={"title": "Lists"}, headers=alice)).json()["conversation_id"]
+            statements.take()
+            response = await client.post(
+                "/chat/", json={"query": "reverse a list", "conversation_id": conversation_id}, headers=alice
+            )
+            response.raise_for_status()
+            assert statements.take()["primary"] > 0
+
+            # Read-your-writes: history right after the turn comes from the primary and shows it.
+            history = (await client.get("/chat/history", params={"conversation_id": conversation_id}, headers=alice)).json()
+            assert len(history) == 1
+            assert statements.take()["replica"] == 0
+
+            time.sleep(STICKY_SECONDS * 2)
+            statements.take()
+            conversations = (await client.get("/chat/conversations", headers=alice)).json()
+            counts = statements.take()
+            assert counts["replica"] > 0 and counts["primary"] == 0
+            # The replica lags: it does not have the conversation yet.
+            assert conversations == []
+        await close_scrape_client()
+
+    asyncio.run(run())
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from app.core.chat_agent import SCRAPE_MAX_BYTES, ChatAgent
+from app.core.scrape_client import close_scrape_client
+from benchmarks.scrape_limits import build_expectations, build_pages, measure, memory_limit
+from benchmarks.stub_server import StubServer
+
+EXPECTATIONS = build_expectations(SCRAPE_MAX_BYTES)
+
+
+@pytest.fixture(scope="module")
+def server():
+    with StubServer(pages=build_pages()) as server:
+        yield server
+
+
+def scrape(url: str) -> tuple[str, float, int]:
+    async def run():
+        try:
+            return await measure(ChatAgent(api_key="test"), url)
+        finally:
+            # The shared client belongs to this event loop; the next test runs in a new one.
+            await close_scrape_client()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("path", list(EXPECTATIONS))
+def test_scrape_is_capped_and_skips_binaries(server, path):
+    text, _, peak = scrape(server.url(path))
+    assert EXPECTATIONS[path](text), f"unexpected text for {path}: {len(text)} chars"
+    assert peak < memory_limit(SCRAPE_MAX_BYTES)
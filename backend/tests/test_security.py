@@ -0,0 +1,65 @@
+import base64
+import os
+
+from cryptography.fernet import Fernet
+
+from app.core.security import SECRET_KEY, _derive_key, decrypt_data, encrypt_data, is_legacy_ciphertext
+from app.repository.db import SessionLocal
+from app.repository.user_repository import UserRepository
+from data.models import User
+from scripts.rewrap_secrets import rewrap
+
+
+def legacy_encrypt(data: str, password: str = SECRET_KEY) -> str:
+    """The pre-v2 "salt.token" format: a full Argon2id derivation per value."""
+    salt = os.urandom(16)
+    token = Fernet(_derive_key(password, salt)).encrypt(data.encode())
+    return f"{base64.urlsafe_b64encode(salt).decode()}.{token.decode()}"
+
+
+def test_v2_round_trip():
+    encrypted = encrypt_data("gemini-key", SECRET_KEY)
+    assert encrypted.startswith("v2.") and not is_legacy_ciphertext(encrypted)
+    assert encrypted != encrypt_data("gemini-key", SECRET_KEY)
+    assert decrypt_data(encrypted, SECRET_KEY) == "gemini-key"
+    assert decrypt_data(encrypted, "another-secret") is None
+
+
+def test_legacy_values_still_decrypt():
+    encrypted = legacy_encrypt("gemini-key")
+    assert is_legacy_ciphertext(encrypted)
+    assert decrypt_data(encrypted, SECRET_KEY) == "gemini-key"
+
+
+def test_rewrap_converts_legacy_rows_only_when_not_a_dry_run(database, capsys):
+    legacy_key, legacy_tokens = legacy_encrypt("gemini-key"), legacy_encrypt("recovery-tokens")
+    with SessionLocal() as db:
+        user_id = UserRepository(db).create("alice", "alice@example.com", "hash", legacy_key, legacy_tokens).id
+        v2_key = encrypt_data("other-key", SECRET_KEY)
+        other_id = UserRepository(db).create("bob", "bob@example.com", "hash", v2_key).id
+
+    rewrap(batch_size=1, dry_run=True)
+    assert "Would rewrap 2 value(s)" in capsys.readouterr().out
+    with SessionLocal() as db:
+        user = db.get(User, user_id)
+        assert (user.encrypted_api_key, user.recovery_tokens) == (legacy_key, legacy_tokens)
+
+    rewrap(batch_size=1, dry_run=False)
+    assert "Rewrapped 2 value(s); 0 value(s) could not be decrypted" in capsys.readouterr().out
+    with SessionLocal() as db:
+        user = db.get(User, user_id)
+        assert not is_legacy_ciphertext(user.encrypted_api_key) and not is_legacy_ciphertext(user.recovery_tokens)
+        assert decrypt_data(user.encrypted_api_key, SECRET_KEY) == "gemini-key"
+        assert decrypt_data(user.recovery_tokens, SECRET_KEY) == "recovery-tokens"
+        assert db.get(User, other_id).encrypted_api_key == v2_key
+
+
+def test_rewrap_leaves_undecryptable_values_alone(database, capsys):
+    foreign = legacy_encrypt("gemini-key", password="another-secret")
+    with SessionLocal() as db:
+        user_id = UserRepository(db).create("alice", "alice@example.com", "hash", foreign).id
+
+    rewrap(batch_size=500, dry_run=False)
+    assert "Rewrapped 0 value(s); 1 value(s) could not be decrypted" in capsys.readouterr().out
+    with SessionLocal() as db:
+        assert db.get(User, user_id).encrypted_api_key == foreign
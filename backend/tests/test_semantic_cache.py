@@ -0,0 +1,116 @@
+import time
+
+from app.core.answer_cache import CachedAnswer
+from app.core.semantic_cache import SemanticCache
+
+ANSWER = CachedAnswer("Use reversed(items) or items[::-1].", ["https://docs.python.org"], 1.5)
+
+
+def cache(**options) -> SemanticCache:
+    options.setdefault("path", None)
+    return SemanticCache("test", **options)
+
+
+def test_similar_questions_hit():
+    semantic = cache()
+    semantic.add("how to reverse a list", ANSWER)
+    match = semantic.lookup("How do I reverse a list in Python?")
+    assert match is not None and match[0].response == ANSWER.response
+    assert semantic.lookup("how to open a file") is None
+
+
+def test_expired_entries_miss_and_are_replaced_on_add():
+    semantic = cache(ttl=0.2)
+    semantic.add("how to reverse a list", ANSWER)
+    time.sleep(0.25)
+    assert semantic.lookup("how to reverse a list") is None
+
+    semantic.add("how to reverse a list", CachedAnswer("items.reverse()"))
+    match = semantic.lookup("how to reverse a list")
+    assert match is not None and match[0].response == "items.reverse()"
+    assert len(semantic) == 1
+
+
+def test_an_expired_best_match_does_not_hide_a_live_one():
+    semantic = cache(ttl=0.5)
+    semantic.add("how to reverse a list", ANSWER)
+    time.sleep(0.3)
+    semantic.add("how do I reverse a list", CachedAnswer("items.reverse()"))
+    time.sleep(0.3)
+    match = semantic.lookup("how to reverse a list")
+    assert match is not None and match[0].response == "items.reverse()"
+
+
+def test_oldest_tenth_is_trimmed_beyond_max_entries():
+    semantic = cache(max_entries=10)
+    for i in range(11):
+        semantic.add(f"question number {i}", ANSWER)
+    assert len(semantic) == 9
+
+
+def vector_files(directory) -> list:
+    return sorted(directory.glob("index.*.f32"))
+
+
+def test_saved_cache_is_memory_mapped_on_load(tmp_path):
+    path = str(tmp_path / "index")
+    semantic = cache(path=path, save_every=0)
+    semantic.add_batch(["how to reverse a list", "how to open a file"], [ANSWER, ANSWER])
+    semantic.save()
+
+    loaded = cache(path=path)
+    assert len(loaded) == 2 and loaded.stats()["memory_mapped_entries"] == 2
+    assert loaded.lookup("how to reverse a list")[0].response == ANSWER.response
+
+
+def test_saves_append_only_the_new_rows(tmp_path):
+    path = str(tmp_path / "index")
+    semantic = cache(path=path, save_every=0)
+    semantic.add_batch(["how to reverse a list", "how to open a file"], [ANSWER, ANSWER])
+    semantic.save()
+    [vectors] = vector_files(tmp_path)
+    size = vectors.stat().st_size
+    written = (tmp_path / "index.jsonl").read_text()
+
+    semantic.add("how to sort a dict by value", ANSWER)
+    semantic.save()
+    assert vector_files(tmp_path) == [vectors]
+    assert vectors.stat().st_size == size + 4 * semantic.embedder.dim
+    lines = (tmp_path / "index.jsonl").read_text()
+    assert lines.startswith(written) and lines.count("\n") == written.count("\n") + 1
+    assert len(cache(path=path)) == 3
+
+
+def test_dropped_rows_rewrite_the_files(tmp_path):
+    path = str(tmp_path / "index")
+    semantic = cache(path=path, save_every=0, max_entries=10)
+    semantic.add_batch([f"question number {i}" for i in range(10)], [ANSWER] * 10)
+    semantic.save()
+    [before] = vector_files(tmp_path)
+
+    semantic.add("question number 10", ANSWER)
+    semantic.save()
+    [after] = vector_files(tmp_path)
+    assert after != before
+    loaded = cache(path=path)
+    assert [entry["query"] for entry in loaded._entries] == [f"question number {i}" for i in range(2, 11)]
+
+
+def test_a_save_cut_short_keeps_the_consistent_rows(tmp_path):
+    path = str(tmp_path / "index")
+    semantic = cache(path=path, save_every=0)
+    semantic.add_batch(["how to reverse a list", "how to open a file"], [ANSWER, ANSWER])
+    semantic.save()
+    [vectors] = vector_files(tmp_path)
+    with open(vectors, "ab") as f:
+        f.write(b"\0" * 4 * semantic.embedder.dim)
+    with open(tmp_path / "index.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"query": "how to')
+
+    loaded = cache(path=path, save_every=0)
+    assert len(loaded) == 2
+    loaded.add("how to sort a dict by value", ANSWER)
+    loaded.save()
+    reloaded = cache(path=path)
+    assert len(reloaded) == 3
+    assert reloaded.lookup("how to sort a dict by value") is not None
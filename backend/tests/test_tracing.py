@@ -0,0 +1,114 @@
+import asyncio
+import json
+from collections import defaultdict
+
+import httpx
+import pytest
+
+from app.core import tracing
+from app.core.scrape_client import close_scrape_client
+from app.core.title_queue import get_title_queue, stop_title_queue
+from main import app
+
+REMOTE_TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+@pytest.fixture
+def traces(database, fake_gemini, tmp_path, monkeypatch):
+    """Exports every request to a JSON-lines file; call the fixture to flush it and read the spans by trace."""
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", True)
+    monkeypatch.setattr(tracing, "TRACING_SAMPLE_RATIO", 1.0)
+    monkeypatch.setattr(tracing, "TRACING_SLOW_SECONDS", 0.0)
+    monkeypatch.setattr(tracing, "_processor", tracing.SpanProcessor(tracing.JsonLinesExporter(str(path))))
+
+    def read() -> dict[str, list[dict]]:
+        tracing.shutdown_tracing()
+        by_trace = defaultdict(list)
+        if path.exists():
+            for line in path.read_text(encoding="utf-8").splitlines():
+                for resource_spans in json.loads(line)["resourceSpans"]:
+                    for scope_spans in resource_spans["scopeSpans"]:
+                        for span in scope_spans["spans"]:
+                            by_trace[span["traceId"]].append(span)
+        return by_trace
+
+    yield read
+    tracing.shutdown_tracing()
+
+
+def run_client(requests) -> dict:
+    """Registers a user, opens a conversation and runs `requests(client, headers, conversation_id)`."""
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://tracing") as client:
+            response = await client.post("/users/register", json={
+                "email": "trace@example.com", "username": "trace", "password": "secret-password", "gemini_api_key": "key",
+            })
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            conversation_id = (await client.post("/chat/new", json={"title": "New Chat"}, headers=headers)).json()["conversation_id"]
+            try:
+                return await requests(client, headers, conversation_id)
+            finally:
+                await get_title_queue().join()
+                await stop_title_queue()
+                await close_scrape_client()
+
+    return asyncio.run(run())
+
+
+def test_chat_request_spans_form_one_tree(traces):
+    async def requests(client, headers, conversation_id):
+        response = await client.post("/chat/", json={"query": "reverse a list", "conversation_id": conversation_id}, headers=headers)
+        return response.headers.get("x-trace-id")
+
+    trace_id = run_client(requests)
+    assert trace_id
+    spans = traces()[trace_id]
+    by_name = {span["name"]: span for span in spans}
+    root = by_name["POST /chat/"]
+    ids = {span["spanId"] for span in spans}
+    assert all(span.get("parentSpanId") in ids for span in spans if span is not root)
+    for name in ("auth.get_current_user", "user.get_cached_by_id", "chat.start_turn", "gemini.generate", "chat_turn.commit"):
+        assert name in by_name
+    # Repository calls run in the threadpool but keep the request span as their parent.
+    assert by_name["chat.start_turn"]["parentSpanId"] == root["spanId"]
+    attributes = {item["key"] for item in by_name["gemini.generate"]["attributes"]}
+    assert {"gen_ai.request.model", "gen_ai.prompt.chars"} <= attributes
+
+
+def test_streamed_answers_and_background_titles(traces):
+    async def requests(client, headers, conversation_id):
+        async with client.stream(
+            "POST", "/chat/stream", json={"query": "and sort it?", "conversation_id": conversation_id}, headers=headers
+        ) as response:
+            async for _ in response.aiter_bytes():
+                pass
+            return response.headers.get("x-trace-id")
+
+    stream_trace_id = run_client(requests)
+    by_trace = traces()
+    assert {"gemini.stream", "chat_turn.commit"} <= {span["name"] for span in by_trace[stream_trace_id]}
+
+    titles = [span for spans in by_trace.values() for span in spans if span["name"] == "title.generate"]
+    assert titles
+    for title in titles:
+        assert "parentSpanId" not in title and title["traceId"] != stream_trace_id
+        assert any(span["name"] == "gemini.title" for span in by_trace[title["traceId"]])
+
+
+def test_sampling_keeps_sampled_parents_and_slow_requests(traces, monkeypatch):
+    async def requests(client, headers, conversation_id):
+        monkeypatch.setattr(tracing, "TRACING_SAMPLE_RATIO", 0.0)
+        unsampled = (await client.get("/chat/conversations", headers=headers)).headers["x-trace-id"]
+        await client.get("/chat/conversations", headers={
+            **headers, "traceparent": f"00-{REMOTE_TRACE_ID}-00f067aa0ba902b7-01",
+        })
+        monkeypatch.setattr(tracing, "TRACING_SLOW_SECONDS", 1e-6)
+        slow = (await client.get("/chat/conversations", headers=headers)).headers["x-trace-id"]
+        return unsampled, slow
+
+    unsampled, slow = run_client(requests)
+    by_trace = traces()
+    assert unsampled not in by_trace
+    assert any(span.get("parentSpanId") == "00f067aa0ba902b7" for span in by_trace[REMOTE_TRACE_ID])
+    assert slow in by_trace
@@ -0,0 +1,46 @@
+import pytest
+
+from app.api.dtos.users.user_update import UserUpdate
+from app.core import gemini_clients
+from app.core.gemini_clients import GeminiClientPool
+from app.core.security import SECRET_KEY, encrypt_data
+from app.repository.db import SessionLocal
+from app.repository.user_repository import UserRepository
+from benchmarks.fakes import fake_genai_client
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(gemini_clients.genai, "Client", fake_genai_client(0))
+    pool = GeminiClientPool()
+    monkeypatch.setattr(gemini_clients, "_client_pool", pool)
+    return pool
+
+
+def create_user(db, api_key: str = "old-key"):
+    return UserRepository(db).create("alice", "alice@example.com", "hash", encrypt_data(api_key, SECRET_KEY))
+
+
+def test_replacing_the_api_key_drops_its_pooled_client(database, pool):
+    with SessionLocal() as db:
+        user = create_user(db)
+        old_client = pool.get("old-key")
+        UserRepository(db).update_api_key(user, encrypt_data("new-key", SECRET_KEY))
+    assert pool.stats()["size"] == 0
+    assert pool.get("old-key") is not old_client
+
+
+def test_profile_key_update_drops_its_pooled_client(database, pool):
+    with SessionLocal() as db:
+        user = create_user(db)
+        pool.get("old-key")
+        UserRepository(db).update_user(user.id, UserUpdate(api_key="new-key"))
+    assert pool.stats()["size"] == 0
+
+
+def test_deleting_the_user_drops_their_pooled_client(database, pool):
+    with SessionLocal() as db:
+        user = create_user(db)
+        pool.get("old-key")
+        UserRepository(db).delete(user)
+    assert pool.stats()["size"] == 0
@@ -9,6 +9,10 @@ import chatService from '../../services/chatService';
 import userService from '../../services/userService';
 import toast from 'react-hot-toast';
 
+const DEFAULT_CHAT_TITLES = ['New Chat', 'Nowy czat'];
+const TITLE_POLL_ATTEMPTS = 5;
+const TITLE_POLL_INTERVAL_MS = 1500;
+
 const parseJwt = (token) => {
     try {
         const base64Url = token.split('.')[1];
@@ -82,14 +86,39 @@ const HomePage = () => {
         }
     };
 
+    const updateChatTitle = (conversationId, title) => {
+        setChatHistory(prevHistory =>
+            prevHistory.map(chat =>
+                chat.id === conversationId ? { ...chat, title } : chat
+            )
+        );
+    };
+
+    const pollChatTitle = async (conversationId, attempts = TITLE_POLL_ATTEMPTS) => {
+        // The title is generated in the background after the reply, so re-read the list a few times.
+        for (let i = 0; i < attempts; i++) {
+            await new Promise(resolve => setTimeout(resolve, TITLE_POLL_INTERVAL_MS));
+            try {
+                const conversations = await chatService.getConversations();
+                const conversation = conversations.find(chat => chat.id === conversationId);
+                if (!conversation) return;
+                if (!DEFAULT_CHAT_TITLES.includes(conversation.title)) {
+                    updateChatTitle(conversationId, conversation.title);
+                    return;
+                }
+            } catch (error) {
+                console.error("Błąd odświeżania tytułu:", error);
+                return;
+            }
+        }
+    };
+
     const handleMessageUpdate = (newMessage) => {
         setCurrentMessages((prevMessages) => [...prevMessages, newMessage]);
         if (newMessage.title) {
-            setChatHistory(prevHistory =>
-                prevHistory.map(chat =>
-                    chat.id === newMessage.conversation_id ? { ...chat, title: newMessage.title } : chat
-                )
-            );
+            updateChatTitle(newMessage.conversation_id, newMessage.title);
+        } else if (newMessage.title_pending) {
+            pollChatTitle(newMessage.conversation_id);
         }
     };
 
@@ -70,7 +70,8 @@ const ChatArea = ({ messages, isLoading, activeChatId, onMessageSent }) => {
                 response: data.response,
                 sources: data.sources || [],
                 conversation_id: data.conversation_id,
-                title: data.title
+                title: data.title,
+                title_pending: data.title_pending
             };
 
             if (onMessageSent) {